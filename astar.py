@@ -15,6 +15,7 @@ from agent import Explorer
 from direction import Direction
 from logic import Not
 from object import Thing, Gold, Wall, Pit, Arrow, Stench, Breeze, Glitter, Bump, Scream
+from risk import cell_risks, path_cells, path_risk
 
 
 class WumpusWorldNode:
@@ -263,7 +264,7 @@ class WumpusWorldAStar:
 
         # Use agent's actual direction if provided, else default to Direction.R
         def risky_path_length(target):
-            path = self.find_risky_path(current_pos, target)
+            path = paths[target]
             if not path:
                 return float('inf')
             actions = []
@@ -282,8 +283,12 @@ class WumpusWorldAStar:
                 current_direction = target_direction
             return len(actions)
 
-        targets.sort(key=risky_path_length)
-        print(f"Risky targets sorted by total actions: {targets}")
+        # Chance of stepping on a pit or Wumpus in any cell along the path
+        paths = {target: self.find_risky_path(current_pos, target) for target in targets}
+        cells = {target: path_cells(current_pos, path) for target, path in paths.items()}
+        risks = cell_risks(self.kb, self.env, set().union(*cells.values())) or {}
+        targets.sort(key=lambda target: (path_risk(risks, cells[target]), risky_path_length(target)))
+        print(f"Risky targets sorted by risk, then total actions: {targets}")
         return targets
     
     def plan_wumpus_shot(self, agent: Explorer) -> List[str]:
@@ -556,7 +561,8 @@ class WumpusWorldAStar:
         """
         Plan a risky action when no safe zones are available:
         1. If there's stench in visited zone and agent has arrow, shoot towards unvisited adjacent zone
-        2. Otherwise, move to a random unvisited zone adjacent to visited zones
+        2. Otherwise, move to the unvisited zone adjacent to visited zones least
+           likely to hold a pit or Wumpus (a random one if the KB cannot tell)
         """
         import random
         
@@ -598,9 +604,14 @@ class WumpusWorldAStar:
                         print(f"Risky shoot plan: {best_shoot_plan}")
                         return complete_plan
         
-        # Fallback: Move to a random unvisited adjacent position
+        # Fallback: Move to the least risky unvisited adjacent position
         if unvisited_adjacent:
-            target = random.choice(unvisited_adjacent)
+            risks = cell_risks(self.kb, self.env, unvisited_adjacent)
+            if risks:
+                target = min(unvisited_adjacent, key=lambda pos: risks.get(pos, 1.0))
+                print(f"Risk of unvisited adjacent positions: {risks}")
+            else:
+                target = random.choice(unvisited_adjacent)
             print(f"No arrow strategy available, taking calculated risk to move to {target}")
             
             # Try to find a path (even if risky)
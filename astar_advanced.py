@@ -15,6 +15,7 @@ from agent import Explorer
 from direction import Direction
 from logic import Not
 from object import Thing, Gold, Wall, Pit, Arrow, Stench, Breeze, Glitter, Bump, Scream
+from risk import cell_risks, path_cells, path_risk
 
 
 class WumpusWorldNodeAdvanced:
@@ -57,6 +58,10 @@ class WumpusWorldAStarAdvanced:
         self.percept_history = {}
         self.visited_positions = {(1, 1)}
         self.current_stench_positions = set()  # Track positions with stench
+        # The environment's action clock: when the Wumpi move, what the
+        # planner knows about them is dropped, as the KB drops its facts.
+        self.clock = environment.clock
+        self.clock.on_epoch(self.forget_wumpus_knowledge)
         
     def manhattan_distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
         """Calculate Manhattan distance heuristic"""
@@ -85,34 +90,6 @@ class WumpusWorldAStarAdvanced:
         self.visited_positions.add(position)
         self.known_safe.add(position)
         
-        print("qwerty")
-        print(self.env.action_counts)
-        print(self.env.is_advanced)
-        
-        if (self.env.action_counts > 1) and (self.env.action_counts % 5 == 0) and (self.env.is_advanced == True): #TODO: handle this
-            print("Remove Wumpus and Stench clauses ------------------------")
-            self.known_wumpus.clear()
-            
-            for pos, percept in self.percept_history.items():
-                l = []
-                for p in percept:
-                    if isinstance(p, Stench): 
-                        continue 
-                    else:
-                        l.append(p)
-                self.percept_history[pos] = l
-            for pos in self.current_stench_positions:
-                #remove kb
-                self.kb.remove_clause(self.kb.symbols[('Stench', pos[0], pos[1])])
-                self.kb.remove_clause(Not(self.kb.symbols[('Wumpus', pos[0], pos[1])]))
-                print("Remove Wumpus and Stench clauses")
-
-            print("update world Updated")
-
-            self.current_stench_positions.clear()
-            
-            
-            
         # Update knowledge base if available
         if self.kb:
             try:
@@ -138,6 +115,14 @@ class WumpusWorldAStarAdvanced:
                     # This is a good candidate for safe exploration
                     pass
     
+    def forget_wumpus_knowledge(self, epoch: int):
+        """Called by the clock when the Wumpi have moved; the KB expires its own facts."""
+        print(f"Epoch {epoch}: forgetting Wumpus and Stench knowledge")
+        self.known_wumpus.clear()
+        for pos, percepts in self.percept_history.items():
+            self.percept_history[pos] = [p for p in percepts if not isinstance(p, Stench)]
+        self.current_stench_positions.clear()
+
     def is_position_safe(self, position: Tuple[int, int]) -> bool: #TODO: handle this
         """
         Determine if a position is safe using multiple approaches:
@@ -147,7 +132,7 @@ class WumpusWorldAStarAdvanced:
         """
         # Already visited/known safe
 
-        if (self.env.action_counts % 5 <= 1 and self.env.is_advanced == True) and (position in self.current_stench_positions):
+        if (self.clock.phase <= 1 and self.env.is_advanced == True) and (position in self.current_stench_positions):
             return False
         
         if position in self.known_unsafe or position in self.known_wumpus:
@@ -294,7 +279,7 @@ class WumpusWorldAStarAdvanced:
 
         # Use agent's actual direction if provided, else default to Direction.R
         def risky_path_length(target):
-            path = self.find_risky_path(current_pos, target)
+            path = paths[target]
             if not path:
                 return float('inf')
             actions = []
@@ -313,8 +298,12 @@ class WumpusWorldAStarAdvanced:
                 current_direction = target_direction
             return len(actions)
 
-        targets.sort(key=risky_path_length)
-        print(f"Risky targets sorted by total actions: {targets}")
+        # Chance of stepping on a pit or Wumpus in any cell along the path
+        paths = {target: self.find_risky_path(current_pos, target) for target in targets}
+        cells = {target: path_cells(current_pos, path) for target, path in paths.items()}
+        risks = cell_risks(self.kb, self.env, set().union(*cells.values())) or {}
+        targets.sort(key=lambda target: (path_risk(risks, cells[target]), risky_path_length(target)))
+        print(f"Risky targets sorted by risk, then total actions: {targets}")
         return targets
     
     def plan_wumpus_shot(self, agent: Explorer) -> List[str]:
@@ -587,7 +576,8 @@ class WumpusWorldAStarAdvanced:
         """
         Plan a risky action when no safe zones are available:
         1. If there's stench in visited zone and agent has arrow, shoot towards unvisited adjacent zone
-        2. Otherwise, move to a random unvisited zone adjacent to visited zones
+        2. Otherwise, move to the unvisited zone adjacent to visited zones least
+           likely to hold a pit or Wumpus (a random one if the KB cannot tell)
         """
         import random
         
@@ -629,9 +619,14 @@ class WumpusWorldAStarAdvanced:
                         print(f"Risky shoot plan: {best_shoot_plan}")
                         return complete_plan
         
-        # Fallback: Move to a random unvisited adjacent position
+        # Fallback: Move to the least risky unvisited adjacent position
         if unvisited_adjacent:
-            target = random.choice(unvisited_adjacent)
+            risks = cell_risks(self.kb, self.env, unvisited_adjacent)
+            if risks:
+                target = min(unvisited_adjacent, key=lambda pos: risks.get(pos, 1.0))
+                print(f"Risk of unvisited adjacent positions: {risks}")
+            else:
+                target = random.choice(unvisited_adjacent)
             print(f"No arrow strategy available, taking calculated risk to move to {target}")
             
             # Try to find a path (even if risky)
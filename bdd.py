@@ -0,0 +1,394 @@
+"""
+Reduced ordered binary decision diagrams (OBDDs) of the static Wumpus theory.
+
+A BDD manager keeps every node once (the unique table), so two equivalent
+functions over the same variable order are the same node: satisfiability is
+a comparison with the false terminal, and weighted model counting takes
+time linear in the size of the diagram.
+
+Compiling the whole static theory (KnowledgeBase.add_temporal_sentence) is
+exponential in N: each Breeze_y_x / Stench_y_x biconditional keeps the
+diagram open until its last neighbour, and a row-major cut crosses about
+2N of them. But Breeze and Stench are defined by the hazards around them,
+so StaticTheory compiles, once per board size (compile_static):
+
+- the theory over the Pit and Wumpus symbols alone (no pit and Wumpus in
+  one cell), ordered row-major, a cell's Pit then Wumpus;
+- the gate of every percept: the Or of the matching hazards around it.
+
+A KB that adds only unit facts to the static theory is then compiled by
+conjoining the facts with it, a told percept as its gate or the gate's
+negation. Only the hazards next to told percepts stay entangled, so the
+diagram follows the frontier of the explored region, not the board.
+"""
+
+from functools import lru_cache
+
+from grid_propagator import PERCEPTS
+from logic import Not
+import sat_solver
+
+FALSE, TRUE = 0, 1
+
+
+class NodeBudgetExceeded(Exception):
+    pass
+
+
+class BDD:
+    def __init__(self, variables, max_nodes=None):
+        self.order = list(variables)    # level -> variable
+        self.level = {var: level for level, var in enumerate(self.order)}
+        self.nodes = [None, None]       # node -> (level, low, high); 0 and 1 are the terminals
+        self.unique = {}
+        self.max_nodes = max_nodes
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def node_level(self, u):
+        return len(self.order) if u <= TRUE else self.nodes[u][0]
+
+    def _make(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        u = self.unique.get(key)
+        if u is None:
+            if self.max_nodes is not None and len(self.nodes) >= self.max_nodes:
+                raise NodeBudgetExceeded(len(self.nodes))
+            u = len(self.nodes)
+            self.nodes.append(key)
+            self.unique[key] = u
+        return u
+
+    def literal(self, lit):
+        level = self.level[abs(lit)]
+        return self._make(level, FALSE, TRUE) if lit > 0 else self._make(level, TRUE, FALSE)
+
+    def clause(self, literals):
+        """Node of the disjunction of integer literals."""
+        u = FALSE
+        for lit in sorted(literals, key=lambda lit: self.level[abs(lit)], reverse=True):
+            level = self.level[abs(lit)]
+            u = self._make(level, u, TRUE) if lit > 0 else self._make(level, TRUE, u)
+        return u
+
+    def negate(self, u):
+        memo = {FALSE: TRUE, TRUE: FALSE}
+
+        def walk(u):
+            result = memo.get(u)
+            if result is None:
+                level, low, high = self.nodes[u]
+                result = memo[u] = self._make(level, walk(low), walk(high))
+            return result
+
+        return walk(u)
+
+    def conjoin(self, u, v):
+        """Node of u and v.
+
+        Iterative, since a diagram over the whole board is deeper than
+        Python's recursion limit.
+        """
+        memo = {}
+
+        def settled(u, v):
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE:
+                return v
+            if v == TRUE or u == v:
+                return u
+            return memo.get((u, v) if u < v else (v, u))
+
+        def split(u, v):
+            lu, lv = self.node_level(u), self.node_level(v)
+            level = min(lu, lv)
+            u0, u1 = self.nodes[u][1:] if lu == level else (u, u)
+            v0, v1 = self.nodes[v][1:] if lv == level else (v, v)
+            return level, (u0, v0), (u1, v1)
+
+        result = settled(u, v)
+        if result is not None:
+            return result
+        stack = [(u, v)]
+        while stack:
+            u, v = stack[-1]
+            level, low, high = split(u, v)
+            low_result, high_result = settled(*low), settled(*high)
+            if low_result is None:
+                stack.append(low)
+            elif high_result is None:
+                stack.append(high)
+            else:
+                stack.pop()
+                memo[(u, v) if u < v else (v, u)] = self._make(level, low_result, high_result)
+        return settled(u, v)
+
+    def restrict(self, u, literals):
+        """Condition u on integer literals; those on variables u does not test are ignored."""
+        values = {self.level[abs(lit)]: lit > 0 for lit in literals}
+        memo = {FALSE: FALSE, TRUE: TRUE}
+
+        def walk(u):
+            result = memo.get(u)
+            if result is None:
+                level, low, high = self.nodes[u]
+                value = values.get(level)
+                if value is None:
+                    result = self._make(level, walk(low), walk(high))
+                else:
+                    result = walk(high if value else low)
+                memo[u] = result
+            return result
+
+        return walk(u)
+
+    def disjoin(self, u, v):
+        return self.negate(self.conjoin(self.negate(u), self.negate(v)))
+
+    def count(self, u, weights=None, memo=None):
+        """Weighted model count over every variable of the order (see model_count.count).
+
+        `memo` keeps the count of every node below; it may be shared by
+        calls with the same weights.
+        """
+        weights = weights or {}
+        totals = []
+        for var in self.order:
+            pair = weights.get(var)
+            totals.append(2 if pair is None else pair[0] + pair[1])
+        # prefix[level]: product of the totals of the levels above it
+        prefix = [1]
+        for total in totals:
+            prefix.append(prefix[-1] * total)
+        exact = all(isinstance(total, int) for total in totals)
+        if memo is None:
+            memo = {}
+        memo[FALSE], memo[TRUE] = 0, 1
+
+        def gap(above, below):
+            # Product of the totals of the levels skipped between the two.
+            top, bottom = prefix[above + 1], prefix[self.node_level(below)]
+            return bottom // top if exact else bottom / top
+
+        stack = [u]
+        while stack:
+            node = stack[-1]
+            if node in memo:
+                stack.pop()
+                continue
+            level, low, high = self.nodes[node]
+            if low not in memo:
+                stack.append(low)
+            elif high not in memo:
+                stack.append(high)
+            else:
+                stack.pop()
+                true, false = weights.get(self.order[level], (1, 1))
+                memo[node] = (false * memo[low] * gap(level, low)
+                              + true * memo[high] * gap(level, high))
+        return memo[u] * gap(-1, u)
+
+
+class StaticTheory:
+    """The compiled static theory of an N x N board (see the module docstring).
+
+    BDD variables are numbered 1..2N^2 in order; `variables` maps a
+    (kind, y, x) hazard key to its variable and `gates` maps a (percept,
+    y, x) key to the node of the Or of the hazards around it.
+    """
+
+    # Past this many nodes the manager is rebuilt before the next compile.
+    MAX_NODES = 500000
+
+    def __init__(self, N):
+        self.N = N
+        self.variables = {}
+        for y in range(1, N + 1):
+            for x in range(1, N + 1):
+                for kind in ('Pit', 'Wumpus'):
+                    self.variables[(kind, y, x)] = len(self.variables) + 1
+        # Symbol name -> hazard or percept key
+        self.names = {}
+        for y in range(1, N + 1):
+            for x in range(1, N + 1):
+                for kind in ('Pit', 'Wumpus', *PERCEPTS):
+                    self.names[f'{kind}_{y}_{x}'] = (kind, y, x)
+        self._build()
+
+    def _build(self):
+        self.manager = BDD(self.variables.values())
+        manager, variables = self.manager, self.variables
+        # One clause per cell: no pit and Wumpus together
+        self.exclusions = [manager.clause([-variables[('Pit', y, x)], -variables[('Wumpus', y, x)]])
+                           for y in range(1, self.N + 1) for x in range(1, self.N + 1)]
+        self.gates = {}
+        for percept, hazard in PERCEPTS.items():
+            for y in range(1, self.N + 1):
+                for x in range(1, self.N + 1):
+                    around = [variables[(hazard, ny, nx)]
+                              for ny, nx in [(y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1)]
+                              if 1 <= ny <= self.N and 1 <= nx <= self.N]
+                    self.gates[(percept, y, x)] = manager.clause(around)
+
+    def node(self, key, value=True):
+        """Node of a hazard or percept symbol, or of its negation."""
+        if key in self.variables:
+            return self.manager.literal(self.variables[key] if value else -self.variables[key])
+        gate = self.gates[key]
+        return gate if value else self.manager.negate(gate)
+
+    def condition(self, facts):
+        """Node of the theory with the facts ((kind, y, x), value) conjoined, or None if too large.
+
+        Each percept's gate is restricted by the hazard facts, and the
+        constraints are conjoined from the bottom of the order up, so each
+        one only rebuilds the levels it spans.
+        """
+        if len(self.manager) > self.MAX_NODES:
+            self._build()
+        manager = self.manager
+        manager.max_nodes = len(manager) + self.MAX_NODES
+        try:
+            known = [self.variables[key] if value else -self.variables[key]
+                     for key, value in facts if key in self.variables]
+            constraints = self.exclusions + [manager.literal(lit) for lit in known]
+            for key, value in facts:
+                if key in self.gates:
+                    gate = manager.restrict(self.gates[key], known)
+                    constraints.append(gate if value else manager.negate(gate))
+            root = TRUE
+            for node in sorted(constraints, key=manager.node_level, reverse=True):
+                root = manager.conjoin(node, root)
+                if root == FALSE:
+                    break
+            return root
+        except NodeBudgetExceeded:
+            return None
+        finally:
+            manager.max_nodes = None
+
+    def sentence_node(self, clauses, names):
+        """Node of integer clauses over symbols of the theory (`names` is LiteralTable.names)."""
+        manager = self.manager
+        result = TRUE
+        for clause in clauses:
+            node = FALSE
+            for lit in clause:
+                node = manager.disjoin(node, self.node(self.names[names[abs(lit)]], lit > 0))
+            result = manager.conjoin(result, node)
+        return result
+
+    def weights(self, priors):
+        """BDD variable weights from priors by hazard kind (see model_count.prior_weights)."""
+        weights = {}
+        for (kind, y, x), var in self.variables.items():
+            p = (priors or {}).get(kind)
+            if p is not None:
+                weights[var] = (p, 1 - p)
+        return weights
+
+
+@lru_cache(maxsize=None)
+def compile_static(N):
+    """The StaticTheory of an N x N board, built once per size."""
+    return StaticTheory(N)
+
+
+def compiled(kb):
+    """(theory, node) for a KB that adds only unit facts to its static theory, else None.
+
+    Cached on the KB until its next change, or until the theory rebuilds
+    its manager.
+    """
+    version, manager, result = kb._compiled
+    if version == kb.version and (result is None or manager is result[0].manager):
+        return result
+    result = None
+    if kb.width == kb.height:
+        theory = compile_static(kb.width)
+        facts = _facts(kb, theory)
+        if facts is not None:
+            root = theory.condition(facts)
+            if root is not None:
+                result = (theory, root)
+    kb._compiled = (kb.version, result and result[0].manager, result)
+    return result
+
+
+@lru_cache(maxsize=None)
+def _static_clauses(N):
+    """The non-unit clauses of a fresh N x N KB, as frozensets of (name, sign)."""
+    from knowledgeBase import KnowledgeBase
+    kb = KnowledgeBase(N=N)
+    names = kb.store.table.names
+    return frozenset(frozenset((names[abs(lit)], lit > 0) for lit in clause)
+                     for clause in kb.store.int_clauses if len(clause) > 1)
+
+
+def _facts(kb, theory):
+    """Unit facts of the KB on the theory's symbols, or None if the KB is not static plus units."""
+    names = kb.store.table.names
+    static = _static_clauses(theory.N)
+    facts = []
+    seen = 0
+    for clause in kb.store.int_clauses:
+        if len(clause) == 1:
+            key = theory.names.get(names[abs(clause[0])])
+            if key is not None:
+                facts.append((key, clause[0] > 0))
+        elif frozenset((names[abs(lit)], lit > 0) for lit in clause) in static:
+            seen += 1
+        else:
+            return None
+    return facts if seen == len(static) else None
+
+
+def entails(kb, query):
+    """Decide KB |= query on the compiled theory, or None if the KB or query does not fit it."""
+    result = compiled(kb)
+    if result is None:
+        return None
+    theory, root = result
+    table = kb.store.table
+    query_clauses = table.encode(Not(query))
+    if any(table.names[abs(lit)] not in theory.names for clause in query_clauses for lit in clause):
+        return None
+    return theory.manager.conjoin(root, theory.sentence_node(query_clauses, table.names)) == FALSE
+
+
+def entails_or_solve(kb, query):
+    """The compiled theory's answer when the KB and query fit it, the incremental CDCL solver's otherwise."""
+    answer = entails(kb, query)
+    if answer is None:
+        kb.stats['bdd_fallbacks'] += 1
+        return sat_solver.entails_incremental(kb, query)
+    return answer
+
+
+def marginals(kb, queries, priors=None):
+    """Probability of each query given the KB on the compiled theory (see logic.marginals).
+
+    Returns None if the KB or a query does not fit the theory.
+    """
+    result = compiled(kb)
+    if result is None:
+        return None
+    theory, root = result
+    table = kb.store.table
+    encoded = [table.encode(query) for query in queries]
+    if any(table.names[abs(lit)] not in theory.names
+           for clauses in encoded for clause in clauses for lit in clause):
+        return None
+    manager = theory.manager
+    weights = theory.weights(priors)
+    memo = {}
+    total = manager.count(root, weights, memo)
+    if not total:
+        return dict.fromkeys(queries)
+    return {query: manager.count(manager.conjoin(root, theory.sentence_node(clauses, table.names)),
+                                 weights, memo) / total
+            for query, clauses in zip(queries, encoded)}
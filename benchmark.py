@@ -0,0 +1,172 @@
+"""
+Inference benchmark
+
+Compares asks per second of the string-based resolution engine in logic.py
+against the integer-literal engine in clause_db.py (saturation and
+set-of-support strategies), the CDCL solver in sat_solver.py (built per
+ask, and the KB's persistent incremental solver, alone and behind the grid
+propagator's fast path or the truth table of small slices) and the
+compiled OBDD of the static theory in bdd.py on 4x4, 8x8 and 12x12 boards.
+For the resolution engines the average number of KB clauses kept by the
+relevance slice per ask is reported, and for the integer engine the
+resolved pairs and resolvents per ask as well. Each board gets a fixed
+set of percepts around the start cell, and the queries are the Pit/Wumpus
+safety checks the planner makes for the cells next to the visited ones.
+
+Usage: python benchmark.py [--sizes 4 8 12] [--budget SECONDS] [--seed SEED]
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import random
+import signal
+import time
+
+from environment import WumpusEnvironment
+from knowledgeBase import KnowledgeBase
+from logic import Not, pl_resolution
+import clause_db
+import sat_solver
+import truth_table
+import bdd
+
+
+def fast_path(kb, query):
+    """Grid propagator first, the incremental CDCL solver when it cannot decide."""
+    answer = kb.fast_ask(query)
+    return answer if answer is not None else sat_solver.entails_incremental(kb, query)
+
+
+def small_truth_table(kb, query):
+    """Truth table of the query's slice when it is small, the incremental CDCL solver otherwise."""
+    answer = truth_table.entails(kb, query)
+    return answer if answer is not None else sat_solver.entails_incremental(kb, query)
+
+
+ENGINES = {
+    'resolution': pl_resolution,
+    'int_resolution': clause_db.entails,
+    'set_of_support': lambda kb, query: clause_db.entails(kb, query, 'set_of_support'),
+    'cdcl': sat_solver.entails,
+    'cdcl_incremental': sat_solver.entails_incremental,
+    'fast_path': fast_path,
+    'truth_table': small_truth_table,
+    'bdd': bdd.entails_or_solve,
+}
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise BudgetExceeded()
+
+
+def build_scenario(N, seed, visits=2):
+    """Build a KB with the percepts of a short walk from (1, 1) and its frontier queries.
+
+    The walk only enters cells free of pits and Wumpi, as the agent would,
+    so the KB is consistent with the board.
+    """
+    random.seed(seed)
+    env = WumpusEnvironment(N=N, K_wumpuses=max(1, N // 4), pit_probability=0.2)
+    kb = KnowledgeBase(N=N)
+    visited = [(1, 1)]
+    frontier = [(1, 2), (2, 1)]
+    while len(visited) < visits and frontier:
+        pos = frontier.pop(0)
+        if pos in env.pit_pos or pos in env.wumpus_pos:
+            continue
+        visited.append(pos)
+        y, x = pos
+        frontier.extend(p for p in [(y + 1, x), (y, x + 1)]
+                        if p[0] <= N and p[1] <= N and p not in visited and p not in frontier)
+    for pos in visited:
+        kb.update_percept_sentence(pos, env.percept(pos))
+    assert sat_solver.Solver(kb.store.int_clauses).solve(), "scenario KB is inconsistent"
+
+    queries = []
+    for y, x in visited:
+        for ny, nx in [(y + 1, x), (y - 1, x), (y, x + 1), (y, x - 1)]:
+            if 1 <= ny <= N and 1 <= nx <= N and (ny, nx) not in visited:
+                for kind in ('Pit', 'Wumpus'):
+                    query = Not(kb.symbols[(kind, ny, nx)])
+                    if query not in queries:
+                        queries.append(query)
+    return kb, queries
+
+
+def measure(engine, kb, queries, budget):
+    """Ask the queries round-robin until the budget is spent.
+
+    Each ask may take at most budget / len(queries) seconds; a query that hits
+    the limit is counted as a timeout and dropped from the rotation.
+    Returns (asks, timeouts, seconds spent on finished asks, answers).
+    """
+    answers = {}
+    kb.stats.clear()
+    asks = 0
+    timeouts = 0
+    spent = 0.0
+    per_ask = budget / len(queries)
+    active = list(queries)
+    deadline = time.perf_counter() + budget
+    signal.signal(signal.SIGALRM, _on_alarm)
+    with contextlib.redirect_stdout(io.StringIO()):
+        while active and time.perf_counter() < deadline:
+            query = active[asks % len(active)]
+            start = time.perf_counter()
+            try:
+                signal.setitimer(signal.ITIMER_REAL, per_ask)
+                answer = engine(kb, query)
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            except BudgetExceeded:
+                timeouts += 1
+                active.remove(query)
+                continue
+            spent += time.perf_counter() - start
+            answers[query.formula()] = answer
+            asks += 1
+    signal.setitimer(signal.ITIMER_REAL, 0)
+    return asks, timeouts, spent, answers
+
+
+def run_benchmark(sizes=(4, 8, 12), budget=10.0, seed=7):
+    logging.disable(logging.INFO)
+    print(f"{'N':>4} {'engine':<16} {'asks':>6} {'timeouts':>8} {'asks/s':>10} {'speedup':>8}"
+          f" {'clauses/ask':>11} {'pairs/ask':>10} {'resolvents/ask':>15}")
+    for N in sizes:
+        kb, queries = build_scenario(N, seed)
+        baseline = None
+        results = {}
+        for name, engine in ENGINES.items():
+            asks, timeouts, spent, answers = measure(engine, kb, queries, budget)
+            rate = asks / spent if asks else 0.0
+            if baseline is None:
+                baseline = rate
+            speedup = f"{rate / baseline:.1f}x" if baseline else "-"
+            results[name] = answers
+            clauses = f"{kb.stats['clauses'] / asks:.0f}" if asks and 'clauses' in kb.stats else "-"
+            pairs = f"{kb.stats['pairs'] / asks:.0f}" if asks and 'pairs' in kb.stats else "-"
+            resolvents = f"{kb.stats['resolvents'] / asks:.0f}" if asks and 'resolvents' in kb.stats else "-"
+            print(f"{N:>4} {name:<16} {asks:>6} {timeouts:>8} {rate:>10.2f} {speedup:>8}"
+                  f" {clauses:>11} {pairs:>10} {resolvents:>15}")
+            if 'fast_path' in kb.stats or 'fast_path_fallbacks' in kb.stats:
+                print(f"     grid propagator decided {kb.fast_path_rate():.0%} of the asks")
+        reference = results['resolution']
+        for name, answers in results.items():
+            for formula, answer in answers.items():
+                if formula in reference and reference[formula] != answer:
+                    print(f"     mismatch: {name} answered {answer} for {formula}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4, 8, 12])
+    parser.add_argument('--budget', type=float, default=10.0, help='seconds per engine and board size')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run_benchmark(args.sizes, args.budget, args.seed)
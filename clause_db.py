@@ -0,0 +1,757 @@
+"""
+Integer-literal clause database.
+
+Symbols are numbered from 1 by a LiteralTable. A literal is +id for the symbol
+and -id for its negation, and a clause is a sorted tuple of distinct literals.
+The empty tuple is the empty (contradicted) clause. Sentences are translated
+once at the boundary; everything below works on plain ints.
+"""
+
+import heapq
+from collections import defaultdict
+
+from logic import Symbol, Not, And, Or, to_cnf, flatten_and_clauses
+from propagation import Propagator
+
+
+class LiteralTable:
+    """Bidirectional mapping between symbol names and integer variables.
+
+    With a `symbols` table (symbol_table.SymbolTable), grid symbols take
+    its arithmetic ids, variables 1..symbols.size, and other names are
+    numbered after them; `names` holds None for ids not used yet.
+    """
+
+    def __init__(self, symbols=None):
+        self.ids = {}
+        self.symbols = symbols
+        self.names = [None] * ((symbols.size if symbols is not None else 0) + 1)
+        self._shared = False
+
+    def fork(self):
+        """A table with the same variables; see ClauseStore.fork."""
+        other = LiteralTable.__new__(LiteralTable)
+        other.ids, other.names, other.symbols = self.ids, self.names, self.symbols
+        other._shared = self._shared = True
+        return other
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def variable(self, name):
+        var = self.ids.get(name)
+        if var is None:
+            if self._shared:
+                self.ids, self.names, self._shared = dict(self.ids), list(self.names), False
+            var = self.symbols.id_of_name(name) if self.symbols is not None else None
+            if var is None:
+                var = len(self.names)
+                self.names.append(name)
+            else:
+                self.names[var] = name
+            self.ids[name] = var
+        return var
+
+    def literal(self, sentence):
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not) and isinstance(sentence.operand, Symbol):
+            return -self.variable(sentence.operand.name)
+        raise ValueError(f"Invalid literal: {sentence}")
+
+    def encode_clause(self, clause):
+        """Translate a single CNF clause (literal or Or of literals)."""
+        disjuncts = clause.disjuncts if isinstance(clause, Or) else [clause]
+        return normalize_clause(self.literal(d) for d in disjuncts)
+
+    def encode(self, sentence, tseitin=False):
+        """Translate an arbitrary sentence into a list of integer clauses."""
+        cnf = to_cnf(sentence, tseitin)
+        conjuncts = flatten_and_clauses(cnf.conjuncts) if isinstance(cnf, And) else [cnf]
+        return [self.encode_clause(c) for c in conjuncts]
+
+    def encode_all(self, sentences):
+        """Translate KB conjuncts; ones that are already CNF clauses skip to_cnf."""
+        clauses = []
+        for sentence in sentences:
+            if isinstance(sentence, And):
+                clauses.extend(self.encode_all(sentence.conjuncts))
+                continue
+            try:
+                clauses.append(self.encode_clause(sentence))
+            except ValueError:
+                clauses.extend(self.encode(sentence))
+        return clauses
+
+    def decode_literal(self, literal):
+        symbol = Symbol(self.names[abs(literal)])
+        return symbol if literal > 0 else Not(symbol)
+
+    def decode_clause(self, clause):
+        literals = [self.decode_literal(lit) for lit in clause]
+        return literals[0] if len(literals) == 1 else Or(*literals)
+
+
+class ClauseStore:
+    """CNF clauses of a KB, compiled once when they are told.
+
+    Every KB conjunct gets a clause ID and is converted to its CNF clauses
+    and their integer encoding as it is added. A hash index from conjunct to
+    ID makes add, dedup and remove constant time. Conjuncts are reference
+    counted: adding a stored one again only bumps its count, and remove
+    deletes it when the count drops to zero, leaving a tombstone (None) in
+    `entries`. An ask reads `clauses` (Sentence clauses for
+    logic.pl_resolution) or `int_clauses` (for the integer engines, with
+    `table` as the literal table). These flat lists are kept up to date:
+    a removed conjunct's clauses are swapped with the last ones and popped,
+    so removal costs O(its clauses) and the lists are in no particular order.
+
+    fork() shares everything with a new store copy-on-write: whichever of
+    the two writes first copies the containers, so a KB can start from a
+    shared template of the board axioms for the cost of a few references.
+    """
+
+    def __init__(self, symbols=None):
+        self.table = LiteralTable(symbols)
+        self.entries = []       # id -> (conjunct, its clauses, their integer encoding) or None
+        self.ids = {}           # conjunct -> id
+        self.counts = {}        # conjunct -> times added and not removed
+        self.clauses = []
+        self.int_clauses = []
+        # For each flat list: the id owning each position, and id -> positions
+        self._owners = ([], [])
+        self._positions = ({}, {})
+        self._shared = False
+
+    def fork(self):
+        """A store with the same conjuncts, sharing them until either store changes."""
+        other = ClauseStore.__new__(ClauseStore)
+        other.table = self.table.fork()
+        other.entries, other.ids, other.counts = self.entries, self.ids, self.counts
+        other.clauses, other.int_clauses = self.clauses, self.int_clauses
+        other._owners, other._positions = self._owners, self._positions
+        other._shared = self._shared = True
+        return other
+
+    def _own(self):
+        if self._shared:
+            self.entries, self.ids, self.counts = list(self.entries), dict(self.ids), dict(self.counts)
+            self.clauses, self.int_clauses = list(self.clauses), list(self.int_clauses)
+            self._owners = tuple(list(owners) for owners in self._owners)
+            self._positions = tuple(dict(positions) for positions in self._positions)
+            self._shared = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, conjunct):
+        return conjunct in self.ids
+
+    def add(self, conjunct):
+        """Add a conjunct; returns its ID, or None if it is already stored (and now counted once more)."""
+        if conjunct in self.ids:
+            return self._reference(conjunct)
+        clauses = flatten_and_clauses([conjunct])
+        return self._insert(conjunct, clauses, self.table.encode_all(clauses))
+
+    def add_clause(self, conjunct, clause):
+        """Add a conjunct that is one CNF clause with a known integer encoding.
+
+        Skips to_cnf and the encoding; the clause's variables must already be
+        in the table. Used to load stores from kb_cache.
+        """
+        if conjunct in self.ids:
+            return self._reference(conjunct)
+        return self._insert(conjunct, [conjunct], [clause])
+
+    def _reference(self, conjunct):
+        self._own()
+        self.counts[conjunct] += 1
+        return None
+
+    def _insert(self, conjunct, clauses, int_clauses):
+        self._own()
+        clause_id = len(self.entries)
+        self.entries.append((conjunct, clauses, int_clauses))
+        self.ids[conjunct] = clause_id
+        self.counts[conjunct] = 1
+        for flat, owners, positions, new in zip((self.clauses, self.int_clauses), self._owners,
+                                                self._positions, (clauses, int_clauses)):
+            positions[clause_id] = tuple(range(len(flat), len(flat) + len(new)))
+            flat.extend(new)
+            owners.extend([clause_id] * len(new))
+        return clause_id
+
+    def remove(self, conjunct):
+        """Drop one reference to a conjunct; returns its ID if that deleted it, otherwise None."""
+        if conjunct not in self.ids:
+            return None
+        self._own()
+        if self.counts[conjunct] > 1:
+            self.counts[conjunct] -= 1
+            return None
+        del self.counts[conjunct]
+        clause_id = self.ids.pop(conjunct)
+        self.entries[clause_id] = None
+        for flat, owners, positions in zip((self.clauses, self.int_clauses), self._owners, self._positions):
+            # From the back, so the last clause never belongs to this conjunct
+            for position in sorted(positions.pop(clause_id), reverse=True):
+                last = len(flat) - 1
+                if position != last:
+                    owner = owners[last]
+                    flat[position], owners[position] = flat[last], owner
+                    positions[owner] = tuple(position if p == last else p for p in positions[owner])
+                flat.pop()
+                owners.pop()
+        return clause_id
+
+    def conjuncts(self):
+        return list(self.ids)
+
+    def variables(self, conjunct):
+        """Variables of a stored conjunct."""
+        return {abs(lit) for clause in self.entries[self.ids[conjunct]][2] for lit in clause}
+
+
+def normalize_clause(literals):
+    """Canonical form of a clause: sorted tuple without duplicates."""
+    return tuple(sorted(set(literals)))
+
+
+def is_tautology(clause):
+    """Check if a clause contains a literal and its complement."""
+    literals = set(clause)
+    return any(-lit in literals for lit in clause)
+
+
+def simplify_clause(clause, units):
+    """Simplify a clause using a set of true unit literals.
+
+    Returns None if the clause is satisfied, () if every literal is false,
+    otherwise the clause with the falsified literals removed.
+    """
+    literals = []
+    for lit in clause:
+        if lit in units:
+            return None
+        if -lit not in units:
+            literals.append(lit)
+    return tuple(literals)
+
+
+def pl_resolve(ci, cj):
+    """Resolve two clauses, returning a list of resolvents (() is the empty clause)."""
+    resolvents = []
+    for lit in ci:
+        if -lit in cj:
+            combined = normalize_clause([l for l in ci if l != lit] + [l for l in cj if l != -lit])
+            if not is_tautology(combined):
+                resolvents.append(combined)
+    return resolvents
+
+
+def signature(clause):
+    """64-bit literal signature; sig(c) & ~sig(d) != 0 proves c is not a subset of d."""
+    sig = 0
+    for lit in clause:
+        sig |= 1 << (lit & 63)
+    return sig
+
+
+class ClauseIndex:
+    """Clause set indexed by literal.
+
+    Each clause gets a position in insertion order; `partners` returns the
+    positions of the clauses holding a complement of one of its literals,
+    which are the only clauses it can resolve with. A bitset signature per
+    clause makes the subsumption checks cheap to reject.
+    """
+
+    def __init__(self, clauses=()):
+        self.clauses = []
+        self.signatures = []
+        self.positions = {}
+        self.by_literal = defaultdict(set)
+        self.filed = []                   # position -> literal it is filed under
+        self.by_filed = defaultdict(set)  # literal -> positions filed under it
+        for clause in clauses:
+            self.add(clause)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, clause):
+        return clause in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def add(self, clause):
+        """Insert a clause; returns its position, or None if it is already present."""
+        if clause in self.positions:
+            return None
+        position = len(self.clauses)
+        self.clauses.append(clause)
+        self.signatures.append(signature(clause))
+        self.positions[clause] = position
+        for lit in clause:
+            self.by_literal[lit].add(position)
+        # File the clause under its rarest literal for forward subsumption
+        filed = min(clause, key=lambda lit: len(self.by_literal[lit]), default=None)
+        self.filed.append(filed)
+        self.by_filed[filed].add(position)
+        return position
+
+    def remove(self, clause):
+        position = self.positions.pop(clause)
+        self.clauses[position] = None
+        for lit in clause:
+            self.by_literal[lit].discard(position)
+        self.by_filed[self.filed[position]].discard(position)
+
+    def containing(self, literals):
+        """Clauses holding any of the given literals."""
+        positions = set()
+        for lit in literals:
+            positions |= self.by_literal.get(lit, set())
+        return [self.clauses[p] for p in sorted(positions)]
+
+    def partners(self, clause):
+        """Positions of the clauses that can be resolved against `clause`."""
+        positions = set()
+        for lit in clause:
+            positions |= self.by_literal.get(-lit, set())
+        return positions
+
+    def is_subsumed(self, clause):
+        """Forward subsumption: is some indexed clause a subset of `clause`?"""
+        if clause in self.positions:
+            return True
+        sig = signature(clause)
+        nsig = ~sig
+        signatures = self.signatures
+        # A subset of the clause is filed under one of the clause's literals
+        for lit in clause:
+            for p in self.by_filed.get(lit, ()):
+                if not signatures[p] & nsig and set(self.clauses[p]).issubset(clause):
+                    return True
+        return False
+
+    def subsumed_by(self, clause):
+        """Backward subsumption: indexed clauses that are strict supersets of `clause`."""
+        if not clause:
+            return [c for c in self.positions if c]
+        sig = signature(clause)
+        # Every superset holds the rarest literal of the clause
+        rarest = min(clause, key=lambda lit: len(self.by_literal.get(lit, ())))
+        found = []
+        for p in self.by_literal.get(rarest, ()):
+            other = self.clauses[p]
+            if (len(other) > len(clause) and not sig & ~self.signatures[p]
+                    and set(clause).issubset(other)):
+                found.append(other)
+        return found
+
+    def insert(self, clause):
+        """Add a clause unless it is subsumed, removing the clauses it subsumes.
+
+        Returns (position or None, number of clauses removed).
+        """
+        if self.is_subsumed(clause):
+            return None, 0
+        removed = self.subsumed_by(clause)
+        for other in removed:
+            self.remove(other)
+        return self.add(clause), len(removed)
+
+
+def pl_resolution(clauses, query_clauses, max_iterations=1000, stats=None):
+    """Resolution refutation over integer clauses.
+
+    `query_clauses` is the encoded negated query. Follows logic.pl_resolution,
+    except that unit propagation runs to fixpoint with watched literals and
+    clauses are kept in a ClauseIndex: each round resolves the clauses that
+    are new or changed since the previous round against their complementary
+    partners only, and resolvents are inserted into the index incrementally.
+    Resolvents subsumed by an indexed clause are dropped, and indexed clauses
+    subsumed by a resolvent are removed. Pair, resolvent and subsumption
+    counts are added to `stats` if given. Returns True if a contradiction is
+    derived.
+    """
+    counts = {'pairs': 0, 'resolvents': 0, 'subsumed': 0, 'removed': 0}
+    try:
+        return _saturate(clauses, query_clauses, max_iterations, counts)
+    finally:
+        _record(stats, counts)
+
+
+def _insert(index, clause, counts):
+    """Insert into a ClauseIndex with subsumption, counting what was dropped."""
+    position, removed = index.insert(clause)
+    if position is None:
+        counts['subsumed'] += 1
+    counts['removed'] += removed
+    return position
+
+
+def _record(stats, counts):
+    if stats is not None:
+        for key, value in counts.items():
+            stats[key] = stats.get(key, 0) + value
+
+
+def _saturate(clauses, query_clauses, max_iterations, counts):
+    # Simplify clauses with unit propagation; many queries end here
+    propagator = Propagator()
+    for clause in list(clauses) + list(query_clauses):
+        clause = normalize_clause(clause)
+        if not is_tautology(clause) and not propagator.add_clause(clause):
+            return True
+    simplified = propagator.simplify()
+    if simplified is None:
+        return True
+    units, current = simplified
+
+    index = ClauseIndex()
+    for clause in sorted(current, key=len):
+        _insert(index, clause, counts)
+    fresh = sorted(index.positions.values())
+    iteration = 0
+    while iteration < max_iterations:
+        new = set()
+        fresh_set = set(fresh)
+        for i in fresh:
+            ci = index.clauses[i]
+            for j in sorted(index.partners(ci)):
+                # A pair of two fresh clauses is resolved once, from its lower position.
+                if j in fresh_set and j <= i:
+                    continue
+                counts['pairs'] += 1
+                for resolvent in pl_resolve(ci, index.clauses[j]):
+                    counts['resolvents'] += 1
+                    simplified = simplify_clause(resolvent, units)
+                    if simplified == ():
+                        return True
+                    if not simplified or simplified in new:
+                        continue
+                    if index.is_subsumed(simplified):
+                        counts['subsumed'] += 1
+                    else:
+                        new.add(simplified)
+        if not new:
+            return False
+
+        # Propagate the resolvents together with everything known so far
+        mark = len(propagator.trail)
+        for clause in sorted(new):
+            if not propagator.add_clause(clause):
+                return True
+        if propagator.propagate() is not None:
+            return True
+        fixed = propagator.trail[mark:]
+        units.update(fixed)
+        touched = fixed + [-lit for lit in fixed]
+
+        # As in logic.pl_resolution, stop unless the round fixed a variable
+        # that one of its resolvents depends on
+        touched_set = frozenset(touched)
+        if all(touched_set.isdisjoint(c) for c in new):
+            return False
+
+        # Re-simplify only the clauses that mention a newly fixed variable
+        fresh = []
+        changed = index.containing(touched)
+        for clause in changed:
+            index.remove(clause)
+        for clause in sorted(changed + sorted(new), key=len):
+            clause = simplify_clause(clause, units)
+            if clause == ():
+                return True
+            if clause and len(clause) > 1:
+                position = _insert(index, clause, counts)
+                if position is not None:
+                    fresh.append(position)
+        fresh = [p for p in fresh if index.clauses[p] is not None]
+        if not fresh:
+            return False
+        iteration += 1
+    return False
+
+
+def sos_resolution(clauses, query_clauses, max_iterations=1000, stats=None):
+    """Set-of-support resolution with unit preference.
+
+    The KB clauses are propagated and simplified on their own and form the
+    usable set; the support set starts with the negated query. Every step
+    resolves the shortest support clause (units first) against its partners
+    in the usable set, so each resolvent has a parent derived from the query.
+    Resolvents subsumed by a usable or support clause are dropped, and the
+    clauses they subsume are removed. At most `max_iterations` support
+    clauses are processed. Pair, resolvent and subsumption counts are added
+    to `stats` if given.
+    """
+    counts = {'pairs': 0, 'resolvents': 0, 'subsumed': 0, 'removed': 0}
+    try:
+        return _set_of_support(clauses, query_clauses, max_iterations, counts)
+    finally:
+        _record(stats, counts)
+
+
+def _set_of_support(clauses, query_clauses, max_iterations, counts):
+    propagator = Propagator()
+    for clause in clauses:
+        clause = normalize_clause(clause)
+        if not is_tautology(clause) and not propagator.add_clause(clause):
+            return True
+    simplified = propagator.simplify()
+    if simplified is None:
+        return True
+    units, usable_clauses = simplified
+    usable = ClauseIndex()
+    for clause in sorted(usable_clauses, key=len):
+        _insert(usable, clause, counts)
+
+    # Support clauses are indexed too, so a resolvent can be checked against
+    # both sets and a pending clause dropped once something subsumes it
+    support = ClauseIndex()
+    queue = []
+
+    def offer(clause):
+        if usable.is_subsumed(clause) or support.is_subsumed(clause):
+            counts['subsumed'] += 1
+            return
+        for index in (usable, support):
+            removed = index.subsumed_by(clause)
+            for other in removed:
+                index.remove(other)
+            counts['removed'] += len(removed)
+        support.add(clause)
+        heapq.heappush(queue, (len(clause), clause))
+
+    for clause in query_clauses:
+        clause = simplify_clause(normalize_clause(clause), units)
+        if clause == ():
+            return True
+        if clause and not is_tautology(clause):
+            offer(clause)
+
+    processed = 0
+    while queue and processed < max_iterations:
+        _, given = heapq.heappop(queue)
+        if given not in support:
+            continue
+        support.remove(given)
+        usable.add(given)
+        processed += 1
+        for j in sorted(usable.partners(given)):
+            partner = usable.clauses[j]
+            if partner is None:  # removed by a resolvent of this round
+                continue
+            counts['pairs'] += 1
+            for resolvent in pl_resolve(given, partner):
+                counts['resolvents'] += 1
+                resolvent = simplify_clause(resolvent, units)
+                if resolvent == ():
+                    return True
+                if resolvent:
+                    offer(resolvent)
+    return False
+
+
+def dependencies(clauses):
+    """Map each variable to the variables an entailment query on it depends on.
+
+    Unit clauses fix their variables. The remaining variables are grouped into
+    components joined by the clauses that no unit satisfies, and each group
+    also takes in the fixed variables of the clauses touching it: removing
+    such a unit would bring those clauses back into play. As long as the
+    clauses are consistent, whether they entail a query only changes when a
+    clause mentioning one of these variables is added or removed.
+    """
+    units = {clause[0] for clause in clauses if len(clause) == 1}
+    parent = {}
+
+    def find(var):
+        root = var
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[var] != root:
+            parent[var], var = root, parent[var]
+        return root
+
+    attached = []
+    for clause in clauses:
+        if len(clause) < 2:
+            continue
+        live = [abs(lit) for lit in clause if lit not in units and -lit not in units]
+        fixed = [abs(lit) for lit in clause if lit in units or -lit in units]
+        if live and not any(lit in units for lit in clause):
+            root = find(live[0])
+            for var in live[1:]:
+                other = find(var)
+                if other != root:
+                    parent[other] = root
+        if live and fixed:
+            attached.append((live, fixed))
+
+    groups = defaultdict(set)
+    for var in list(parent):
+        groups[find(var)].add(var)
+    for live, fixed in attached:
+        for var in live:
+            groups[find(var)].update(fixed)
+    for lit in units:
+        groups[find(abs(lit))].add(abs(lit))
+    frozen = {root: frozenset(group) for root, group in groups.items()}
+    return {var: frozen[find(var)] for var in parent}
+
+
+def cell_of(name):
+    """Grid cell (y, x) of a `Kind_y_x` symbol name, or None."""
+    parts = name.split('_')
+    if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+        return int(parts[1]), int(parts[2])
+    return None
+
+
+class RelevanceSlicer:
+    """Cone-of-influence slices of a propagated clause set.
+
+    Built from the result of Propagator.simplify (`units` and the remaining
+    `clauses`). Variables whose resolvents are all tautologies are
+    eliminated once, together with their clauses: an unobserved Breeze_y_x
+    or Stench_y_x only defines itself through its biconditional, and a
+    variable left with a single polarity goes the same way. A slice for a
+    query then keeps the clauses connected to the query variables through
+    shared variables, with the units on the variables they mention.
+
+    If the query mentions an eliminated variable, the clauses removed with
+    it come back, and so do those of every variable eliminated later that
+    they mention. As with dependencies(), a slice decides the same queries
+    as the full clause set only while the clauses are consistent.
+    """
+
+    def __init__(self, units, clauses, names=None):
+        self.units = units
+        self.names = names
+        live, self.eliminated = _eliminate(clauses)
+        self.by_var = defaultdict(list)
+        for clause in sorted(live):
+            for lit in clause:
+                self.by_var[abs(lit)].append(clause)
+
+    def slice(self, query_clauses, radius=None):
+        """Clauses relevant to an encoded negated query.
+
+        With `radius`, clauses mentioning a cell farther than `radius`
+        (Manhattan distance) from every cell of the query are left out too;
+        this needs the LiteralTable names. Answers then stay sound but may
+        miss entailments that need distant clauses.
+        """
+        query_vars = {abs(lit) for clause in query_clauses for lit in clause}
+        restored = defaultdict(list)
+        heap = [(self.eliminated[var][0], var) for var in query_vars if var in self.eliminated]
+        heapq.heapify(heap)
+        queued = {var for _, var in heap}
+        while heap:
+            step, var = heapq.heappop(heap)
+            for clause in self.eliminated[var][1]:
+                for lit in clause:
+                    restored[abs(lit)].append(clause)
+                    other = abs(lit)
+                    if other not in queued and other in self.eliminated and self.eliminated[other][0] > step:
+                        queued.add(other)
+                        heapq.heappush(heap, (self.eliminated[other][0], other))
+
+        near = None
+        if radius is not None and self.names is not None:
+            centres = [cell for cell in (cell_of(self.names[var]) for var in query_vars if var < len(self.names))
+                       if cell]
+            if centres:
+                def near(var):
+                    cell = cell_of(self.names[var])
+                    return cell is None or any(abs(cell[0] - y) + abs(cell[1] - x) <= radius for y, x in centres)
+
+        def component(occurrences):
+            kept = set()
+            seen = set(query_vars)
+            stack = list(query_vars)
+            while stack:
+                var = stack.pop()
+                for clause in occurrences(var):
+                    if clause in kept:
+                        continue
+                    if near is not None and not all(near(abs(lit)) for lit in clause):
+                        continue
+                    kept.add(clause)
+                    for lit in clause:
+                        if abs(lit) not in seen:
+                            seen.add(abs(lit))
+                            stack.append(abs(lit))
+            return kept
+
+        kept = component(lambda var: self.by_var.get(var, []) + restored.get(var, []))
+        if restored:
+            # The restored clauses may be eliminable again now that the
+            # query variables are kept.
+            live, _ = _eliminate(kept, query_vars)
+            by_var = defaultdict(list)
+            for clause in live:
+                for lit in clause:
+                    by_var[abs(lit)].append(clause)
+            kept = component(lambda var: by_var.get(var, []))
+        variables = {abs(lit) for clause in kept for lit in clause} | query_vars
+        return [(lit,) for lit in sorted(self.units, key=abs) if abs(lit) in variables] + sorted(kept)
+
+
+def _eliminate(clauses, keep=()):
+    """Eliminate the variables (other than `keep`) whose resolvents are all tautologies.
+
+    Returns the surviving clauses and, for each eliminated variable, the
+    order it went in and the clauses removed with it.
+    """
+    occurs = defaultdict(set)
+    for clause in clauses:
+        for lit in clause:
+            occurs[lit].add(clause)
+    live = set(clauses)
+    eliminated = {}
+    pending = sorted({abs(lit) for lit in occurs}, reverse=True)
+    while pending:
+        var = pending.pop()
+        positive, negative = occurs[var], occurs[-var]
+        if var in eliminated or var in keep or not (positive or negative):
+            continue
+        if len(positive) * len(negative) > 64:
+            continue
+        if not all(is_tautology(resolvent) for a in positive for b in negative
+                   for resolvent in pl_resolve(a, b)):
+            continue
+        removed = positive | negative
+        eliminated[var] = (len(eliminated), removed)
+        for clause in removed:
+            live.discard(clause)
+            for lit in clause:
+                occurs[lit].discard(clause)
+                if abs(lit) != var:
+                    pending.append(abs(lit))
+    return live, eliminated
+
+
+STRATEGIES = {
+    'saturation': pl_resolution,
+    'set_of_support': sos_resolution,
+}
+
+
+def entails(kb, query, strategy='saturation'):
+    """Decide KB |= query with the integer resolution engine.
+
+    Only the slice of the KB relevant to the query is resolved
+    (KnowledgeBase.relevant_clauses). Pair and resolvent counters and the
+    size of the slice are accumulated in kb.stats.
+    """
+    query_clauses = kb.store.table.encode(Not(query))
+    clauses = kb.relevant_clauses(query_clauses)
+    kb.stats['clauses'] += len(clauses)
+    return STRATEGIES[strategy](clauses, query_clauses, stats=kb.stats)
@@ -0,0 +1,37 @@
+"""
+Action clock shared by the environment, the KB and the planner.
+
+Every executed action ticks it once. When the Wumpi move (advanced mode)
+they do so every `period` actions, and each move starts a new epoch: what
+was learnt about them in an older epoch may no longer hold. Listeners
+registered with on_epoch() are called with the new epoch, in the order they
+were registered, as soon as it starts.
+"""
+
+WUMPUS_MOVE_PERIOD = 5
+
+
+class EpochClock:
+    def __init__(self, period=WUMPUS_MOVE_PERIOD):
+        self.period = period    # actions per epoch; None if the Wumpi never move
+        self.actions = 0
+        self.epoch = 0
+        self._listeners = []
+
+    @property
+    def phase(self):
+        """Actions taken since the current epoch started."""
+        return self.actions % self.period if self.period else self.actions
+
+    def on_epoch(self, listener):
+        self._listeners.append(listener)
+
+    def tick(self):
+        """Count an action; returns True if it started a new epoch."""
+        self.actions += 1
+        if not self.period or self.actions % self.period:
+            return False
+        self.epoch += 1
+        for listener in list(self._listeners):
+            listener(self.epoch)
+        return True
@@ -2,6 +2,7 @@ import random
 from object import Thing, Gold, Wall, Pit, Arrow, Stench, Breeze, Glitter, Bump, Scream
 from agent import Explorer, Wumpus
 from direction import Direction
+from clock import EpochClock, WUMPUS_MOVE_PERIOD
 import time
 
 class WumpusEnvironment:
@@ -16,8 +17,9 @@ class WumpusEnvironment:
         self.status = "ongoing"
         self.gold_taken = False
         self.pit_pos = []
-        self.action_counts = 0
         self.is_advanced = advanced_setting
+        # Shared with the KB and the planner; the Wumpi move when an epoch starts
+        self.clock = EpochClock(WUMPUS_MOVE_PERIOD if advanced_setting else None)
 
         self.add_wall()
 
@@ -73,6 +75,10 @@ class WumpusEnvironment:
 
         
 
+    @property
+    def action_counts(self):
+        return self.clock.actions
+
     def add_wall(self):
         for i in range(1, self.height + 1):
             self.board[i][0].append(Wall())
@@ -207,9 +213,8 @@ class WumpusEnvironment:
                     arrow_travel = arrow_direction.move_forward(arrow_travel)
                 agent.has_arrow = False
                 
-        self.action_counts += 1
         # Sau khi thực hiện hành động, kiểm tra đã đến lúc Wumpus di chuyển hay chưa?
-        if(self.is_advanced == True and self.action_counts > 0  and self.action_counts % 5 == 0):
+        if self.clock.tick():
             self.wumpus_move()
         return percepts
 
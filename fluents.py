@@ -0,0 +1,143 @@
+"""
+Time-indexed Wumpus fluents for the moving-wumpus mode.
+
+The KB's grid symbols Wumpus_y_x and Stench_y_x always describe the current
+epoch of the action clock (clock.EpochClock): the fast path, the ask cache
+and the planner's queries keep using them. When the Wumpi move, the told
+sentences about them are re-indexed to the epoch that just ended, as
+Wumpus_y_x_t and Stench_y_x_t, and linked to the new epoch by the
+successor-state axiom of WumpusEnvironment.wumpus_move, which moves each
+Wumpus at most one cell:
+
+    Wumpus_y_x  =>  Wumpus_y_x_t  or  Wumpus_n_t for a neighbour n of (y, x)
+
+(the converse does not hold: a Wumpus shot in between is gone). The ended
+epoch also gets its copies of the board axioms for the cells it mentions:
+Stench_y_x_t <=> some neighbour has Wumpus_n_t, and no Wumpus_y_x_t in a
+pit. Pits do not move and keep their atemporal symbols.
+
+Only the last `window` ended epochs are kept. When an epoch falls out of
+the window, what the KB entails about the Wumpi of the epoch after it is
+told as unit facts on that epoch, and every sentence indexed by the old
+epoch is retracted, so the KB stays bounded however long the episode is.
+"""
+
+from collections import defaultdict
+
+from logic import Symbol, Not, And, Or, Biconditional, to_cnf
+
+FLUENT_KINDS = ('Wumpus', 'Stench')
+FLUENT_WINDOW = 2
+
+
+def fluent(kind, y, x, epoch):
+    """Symbol of a Wumpus or Stench fluent in an ended epoch."""
+    return Symbol(f'{kind}_{y}_{x}_{epoch}')
+
+
+class FluentWindow:
+    def __init__(self, kb, window=FLUENT_WINDOW):
+        self.kb = kb
+        self.window = window
+        self.slices = defaultdict(set)      # epoch -> told sentences indexed by it
+        self.epoch_of = {}                  # told sentence -> its slice
+        self.cells = defaultdict(set)       # epoch -> cells its Wumpus fluents are linked at
+        self.summarized = 0                 # unit facts told when epochs were dropped
+
+    def advance(self, epoch, current):
+        """Start `epoch`: re-index the `current` told sentences (the ones about
+        the Wumpi of the epoch that ended), then slide the window."""
+        ended = epoch - 1
+        kb = self.kb
+        renamed = {sentence: self._at(sentence, ended) for sentence in current}
+        kb.remove_clauses(current)
+        for sentence, indexed in renamed.items():
+            # A successor-state axiom stays in the slice of its older epoch
+            older = self.epoch_of.pop(sentence, None)
+            if older is not None:
+                self.slices[older].discard(sentence)
+            self._tell(indexed, ended if older is None else older)
+
+        # The board axioms of the ended epoch, and the successor-state axioms
+        # into the new one, for the cells its facts mention
+        stenches, wumpi = set(), set()
+        for indexed in renamed.values():
+            for kind, y, x in self._fluent_cells(indexed, ended):
+                (stenches if kind == 'Stench' else wumpi).add((y, x))
+        for y, x in stenches:
+            neighbours = kb.grid.neighbours(y, x)
+            wumpi.update(neighbours)
+            self._tell(Biconditional(fluent('Stench', y, x, ended),
+                                     Or(*[fluent('Wumpus', ny, nx, ended) for ny, nx in neighbours])), ended)
+        for y, x in wumpi:
+            self._tell(Not(And(fluent('Wumpus', y, x, ended), kb.symbols[('Pit', y, x)])), ended)
+        # A cell's axiom can only tell something if its whole neighbourhood
+        # is mentioned, so the linked region shrinks by a ring every epoch
+        # unless new percepts renew it.
+        linked = {(y, x) for y, x in wumpi if wumpi.issuperset(kb.grid.neighbours(y, x))}
+        for y, x in linked:
+            sources = [(y, x)] + kb.grid.neighbours(y, x)
+            self._tell(Or(Not(kb.symbols[('Wumpus', y, x)]),
+                          *[fluent('Wumpus', sy, sx, ended) for sy, sx in sources]), ended)
+        self.cells[ended] = linked
+
+        while self.slices and min(self.slices) < epoch - self.window:
+            self._drop(min(self.slices))
+
+    def _drop(self, epoch):
+        """Summarize an epoch on the next one, then retract everything indexed by it.
+
+        The retraction costs O(the epoch's sentences and what was derived
+        from them; see KnowledgeBase.remove_clauses). The summary is one
+        ask_many, which like any ask after a change may rebuild the KB's
+        per-version indexes.
+        """
+        kb = self.kb
+        following = epoch + 1
+        queries = {}
+        for y, x in self.cells.pop(epoch, ()):
+            symbol = kb.symbols[('Wumpus', y, x)] if following == kb.clock.epoch else fluent('Wumpus', y, x, following)
+            queries[symbol] = Not(symbol)
+        answers = kb.ask_many(list(queries) + list(queries.values()))
+        summary = [query for query, answer in answers.items() if answer]
+        dropped = self.slices.pop(epoch)
+        for sentence in dropped:
+            del self.epoch_of[sentence]
+        kb.remove_clauses(dropped)
+        for fact in summary:
+            self.summarized += 1
+            if following == kb.clock.epoch:
+                kb += fact
+            else:
+                self._tell(fact, following)
+
+    def _tell(self, sentence, epoch):
+        sentence = to_cnf(sentence)
+        self.kb += sentence
+        self.slices[epoch].add(sentence)
+        self.epoch_of[sentence] = epoch
+
+    def _at(self, sentence, epoch):
+        """The sentence with its current Wumpus/Stench symbols indexed by `epoch`."""
+        if isinstance(sentence, Symbol):
+            key = self._key(sentence.name)
+            return fluent(*key, epoch) if key and key[0] in FLUENT_KINDS else sentence
+        if isinstance(sentence, Not):
+            return Not(self._at(sentence.operand, epoch))
+        if isinstance(sentence, And):
+            return And(*[self._at(conjunct, epoch) for conjunct in sentence.conjuncts])
+        if isinstance(sentence, Or):
+            return Or(*[self._at(disjunct, epoch) for disjunct in sentence.disjuncts])
+        raise ValueError(f"Not a CNF sentence: {sentence}")
+
+    def _key(self, name):
+        var = self.kb.symbols.id_of_name(name)
+        return self.kb.symbols.key(var) if var is not None else None
+
+    def _fluent_cells(self, sentence, epoch):
+        suffix = f'_{epoch}'
+        for name in sentence.symbols():
+            key = self._key(name[:-len(suffix)]) if name.endswith(suffix) else None
+            if key and key[0] in FLUENT_KINDS:
+                yield key
+
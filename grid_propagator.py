@@ -0,0 +1,158 @@
+"""
+Minesweeper-style propagation of Breeze/Stench percepts on the grid.
+
+The KB tells this propagator every unit fact it stores about a Pit, Wumpus,
+Breeze or Stench symbol, and nothing else, so what it derives follows from
+facts actually in the KB and its adjacency axioms:
+
+- no breeze (stench) at a cell: no pit (Wumpus) in any neighbour;
+- a breeze (stench) at a cell whose neighbours are all known free of pits
+  (Wumpi) but one: that one holds it;
+- a pit and a Wumpus never share a cell.
+
+Every cell with a positive percept keeps a counter of the neighbours not yet
+known to be free of the matching hazard, so each new fact costs O(1) work per
+neighbour and a lookup answers in O(1). Each derived value records the
+values it was derived from, so retracting facts withdraws only their
+consequences and applies the rules again around them (delete and
+rederive). Anything the rules cannot settle is left to the general
+inference engine.
+"""
+
+from collections import defaultdict
+
+HAZARDS = {'Pit': 'Breeze', 'Wumpus': 'Stench'}
+PERCEPTS = {percept: hazard for hazard, percept in HAZARDS.items()}
+KINDS = set(HAZARDS) | set(PERCEPTS)
+
+
+class GridPropagator:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.facts = {}         # (kind, y, x) -> value told by the KB
+        self.values = {}        # (kind, y, x) -> value told or derived
+        self.open = {}          # (percept, y, x) -> neighbours not known hazard-free
+        self.support = {}       # derived key -> the keys it was derived from
+        self.dependents = defaultdict(set)  # key -> derived keys it supports
+        self.conflicts = 0
+
+    def neighbours(self, y, x):
+        return [(ny, nx) for ny, nx in [(y + 1, x), (y - 1, x), (y, x + 1), (y, x - 1)]
+                if 1 <= ny <= self.height and 1 <= nx <= self.width]
+
+    def value(self, kind, y, x):
+        """True or False if the facts settle the symbol, otherwise None."""
+        return self.values.get((kind, y, x))
+
+    def tell(self, kind, y, x, value):
+        if kind not in KINDS:
+            return
+        key = (kind, y, x)
+        self.facts[key] = value
+        if self.values.get(key) == value:
+            # Derived before: it now holds on its own
+            self._unsupport(key)
+        self._set([(key, value, ())])
+
+    def retract(self, kind, y, x):
+        self.retract_all([(kind, y, x)])
+
+    def retract_all(self, keys):
+        """Retract several facts, withdrawing the values derived from them.
+
+        Costs O(their consequences and the cells around them), not a
+        replay of the remaining facts.
+        """
+        keys = [key for key in keys if self.facts.pop(key, None) is not None]
+        withdrawn = set()
+        stack = list(keys)
+        while stack:
+            key = stack.pop()
+            if key not in withdrawn:
+                withdrawn.add(key)
+                stack.extend(self.dependents.pop(key, ()))
+        for key in withdrawn:
+            self.values.pop(key, None)
+            self.open.pop(key, None)
+            self._unsupport(key)
+
+        # Rederive: a value is derived by the rules of its own cell or of a
+        # neighbour, so apply those of the remaining values next to the
+        # withdrawn ones again
+        queue = []
+        cells = set()
+        for _, y, x in withdrawn:
+            cells.add((y, x))
+            cells.update(self.neighbours(y, x))
+        for y, x in cells:
+            for kind in KINDS:
+                key = (kind, y, x)
+                value = self.values.get(key)
+                if value is None:
+                    continue
+                if kind in PERCEPTS and value:
+                    hazard = PERCEPTS[kind]
+                    self.open[key] = sum(1 for ny, nx in self.neighbours(y, x)
+                                         if self.values.get((hazard, ny, nx)) is not False)
+                    self._check(key, queue)
+                elif kind in PERCEPTS or value:
+                    self._consequences(key, value, queue)
+        self._set(queue)
+
+    def _unsupport(self, key):
+        for source in self.support.pop(key, ()):
+            dependents = self.dependents.get(source)
+            if dependents:
+                dependents.discard(key)
+
+    def _set(self, queue):
+        """Set the queued (key, value, support) values and everything they imply."""
+        while queue:
+            key, value, support = queue.pop()
+            known = self.values.get(key)
+            if known is not None:
+                if known != value:
+                    self.conflicts += 1
+                continue
+            self.values[key] = value
+            if support:
+                self.support[key] = support
+                for source in support:
+                    self.dependents[source].add(key)
+            kind, y, x = key
+            if kind in HAZARDS and not value:
+                # One more cell known free: tighten the counters around it.
+                for ny, nx in self.neighbours(y, x):
+                    counter = (HAZARDS[kind], ny, nx)
+                    if counter in self.open:
+                        self.open[counter] -= 1
+                        self._check(counter, queue)
+            elif kind in PERCEPTS and value:
+                hazard = PERCEPTS[kind]
+                self.open[key] = sum(1 for ny, nx in self.neighbours(y, x)
+                                     if self.values.get((hazard, ny, nx)) is not False)
+                self._check(key, queue)
+            else:
+                self._consequences(key, value, queue)
+
+    def _consequences(self, key, value, queue):
+        """Queue what a pit or Wumpus, or a missing breeze or stench, implies."""
+        kind, y, x = key
+        if kind in HAZARDS:
+            other = 'Wumpus' if kind == 'Pit' else 'Pit'
+            queue.append(((other, y, x), False, (key,)))
+        else:
+            hazard = PERCEPTS[kind]
+            queue.extend(((hazard, ny, nx), False, (key,)) for ny, nx in self.neighbours(y, x))
+
+    def _check(self, counter, queue):
+        if self.open[counter] != 1:
+            return
+        percept, y, x = counter
+        hazard = PERCEPTS[percept]
+        free = [(hazard, ny, nx) for ny, nx in self.neighbours(y, x)
+                if self.values.get((hazard, ny, nx)) is False]
+        for ny, nx in self.neighbours(y, x):
+            if self.values.get((hazard, ny, nx)) is not False:
+                queue.append(((hazard, ny, nx), True, (counter, *free)))
@@ -0,0 +1,143 @@
+"""
+On-disk cache of the compiled initial KB of a board size.
+
+knowledgeBase.AXIOM_TEMPLATES saves the axiom conversion within a process;
+this module saves it across processes. It is opt-in: build_init_kb uses
+it when given a cache_dir or when $WUMPUS_KB_CACHE is set. A template
+store is written as one file per (N, is_advanced):
+
+    header    MAGIC, FORMAT_VERSION, N, byte order, is_advanced, conjunct
+              count, literal count, sha256 of the axiom generator  (struct HEADER)
+    offsets   uint32[count + 1]: conjunct i is literals[offsets[i]:offsets[i + 1]]
+    kinds     uint8[count], padded to 4 bytes: 1 if the conjunct is an Or
+    literals  int32[...]: the conjunct's literals in disjunct order
+
+Arrays are in native byte order (recorded in the header) and 4-byte aligned,
+so they are read straight from an mmap of the file. Literals are the grid
+ids of symbol_table.SymbolTable, which depend on N only. A file whose header
+does not match — other version, board size, byte order or generator hash —
+is ignored and rewritten on the next save.
+"""
+
+import hashlib
+import inspect
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from logic import Symbol, Not, Or
+from clause_db import normalize_clause
+
+MAGIC = b'WKBC'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<4sIIBBxxII32s')
+
+
+def default_directory():
+    """$WUMPUS_KB_CACHE, or None (no cache) if it is unset or empty."""
+    return os.environ.get('WUMPUS_KB_CACHE') or None
+
+
+def path(directory, N, is_advanced):
+    return os.path.join(directory, f'kb-{N}-{int(is_advanced)}.bin')
+
+
+def generator_hash(*generators):
+    """sha256 over the source of the functions and modules that build the axioms."""
+    digest = hashlib.sha256(f'{FORMAT_VERSION} {sys.byteorder}'.encode())
+    for generator in generators:
+        try:
+            digest.update(inspect.getsource(generator).encode())
+        except (OSError, TypeError):
+            digest.update(marshal.dumps(generator.__code__))
+    return digest.digest()
+
+
+def save(file_path, store, N, is_advanced, digest):
+    """Write a template store; returns False if it holds anything but grid clauses."""
+    symbols = store.table.symbols
+    offsets, kinds, literals = array('I', [0]), array('B'), array('i')
+    for entry in store.entries:
+        if entry is None:
+            continue
+        conjunct = entry[0]
+        disjuncts = conjunct.disjuncts if isinstance(conjunct, Or) else [conjunct]
+        for disjunct in disjuncts:
+            negated = isinstance(disjunct, Not)
+            symbol = disjunct.operand if negated else disjunct
+            var = symbols.id_of_name(symbol.name) if isinstance(symbol, Symbol) else None
+            if var is None:
+                return False
+            literals.append(-var if negated else var)
+        offsets.append(len(literals))
+        kinds.append(isinstance(conjunct, Or))
+    kinds.extend([0] * (-len(kinds) % 4))
+
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    temporary = f'{file_path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, N, sys.byteorder == 'little', is_advanced,
+                            len(offsets) - 1, len(literals), digest))
+        offsets.tofile(f)
+        kinds.tofile(f)
+        literals.tofile(f)
+    os.replace(temporary, file_path)
+    return True
+
+
+def load(file_path, N, is_advanced, digest, store):
+    """Add the conjuncts of a cached template to an empty ClauseStore.
+
+    Returns False if there is no valid file; the store is then to be discarded.
+    """
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                return _read(view, N, is_advanced, digest, store)
+    except (OSError, ValueError):
+        return False
+
+
+def _read(data, N, is_advanced, digest, store):
+    if len(data) < HEADER.size:
+        return False
+    magic, version, size, little, advanced, count, length, stored_digest = HEADER.unpack(data[:HEADER.size])
+    if (magic, version, size, little, advanced, stored_digest) != \
+            (MAGIC, FORMAT_VERSION, N, sys.byteorder == 'little', is_advanced, digest):
+        return False
+    start = HEADER.size
+    kinds_start = start + 4 * (count + 1)
+    literals_start = kinds_start + count + (-count % 4)
+    if len(data) != literals_start + 4 * length:
+        return False
+    offsets = data[start:kinds_start].cast('I')
+    kinds = data[kinds_start:kinds_start + count]
+    literals = data[literals_start:].cast('i')
+
+    symbols = store.table.symbols
+    if symbols is None or symbols.width != N:
+        return False
+    decoded = {}
+    try:
+        for i in range(count):
+            clause = literals[offsets[i]:offsets[i + 1]].tolist()
+            disjuncts = []
+            for lit in clause:
+                sentence = decoded.get(lit)
+                if sentence is None:
+                    if not 0 < abs(lit) <= symbols.size:
+                        return False
+                    symbol = symbols[symbols.key(abs(lit))]
+                    store.table.variable(symbol.name)
+                    sentence = decoded[lit] = symbol if lit > 0 else Not(symbol)
+                disjuncts.append(sentence)
+            conjunct = Or(*disjuncts) if kinds[i] else disjuncts[0]
+            store.add_clause(conjunct, normalize_clause(clause))
+    finally:
+        offsets.release()
+        kinds.release()
+        literals.release()
+    return True
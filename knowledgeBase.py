@@ -1,63 +1,216 @@
 from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional, shoot, to_cnf, pl_resolution, flatten_and_clauses, normalize_clause
 from object import Thing, Gold, Wall, Pit, Arrow, Stench, Breeze, Glitter, Bump, Scream, MoveForward, TurnLeft, TurnRight, Grab, Shoot
+import logic
+import clause_db
+import kb_cache
+import sat_solver
+import truth_table
+import bdd
+from propagation import Propagator
+from grid_propagator import GridPropagator
+from symbol_table import SymbolTable
+from clock import EpochClock, WUMPUS_MOVE_PERIOD
+from fluents import FluentWindow
 import logging
+from collections import Counter, defaultdict
+from functools import lru_cache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Entailment backends: each takes (kb, query) and returns True if KB |= query.
+BACKENDS = {
+    'resolution': pl_resolution,
+    'int_resolution': clause_db.entails,
+    'cdcl': sat_solver.entails_incremental,
+    'bdd': bdd.entails_or_solve,
+}
+
+# (N, is_advanced) -> (ClauseStore, grid facts) holding the initial knowledge of
+# a board: no hazard at (1, 1) and add_temporal_sentence. New KBs fork the
+# store copy-on-write instead of converting the axioms again. build_init_kb
+# also keeps them on disk across processes (kb_cache).
+AXIOM_TEMPLATES = {}
+
+# Kinds of told facts that a Wumpus move can make false. When the Wumpi
+# move, the ones told in an epoch are re-indexed to it (fluents) as the
+# next one starts.
+EPHEMERAL_KINDS = ('Wumpus', 'Stench')
+
+
 class KnowledgeBase:
-    def __init__(self, knowledge=None, symbols=None, visited=None, N=8, is_advanced=False):
+    def __init__(self, knowledge=None, symbols=None, visited=None, N=8, is_advanced=False, backend='resolution',
+                 clock=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown entailment backend: {backend}")
+        self.backend = backend
+        self.stats = Counter()
         self.width = N
         self.height = N
         self.visited = set(visited or [(1, 1)])
-        self.symbols = symbols or {}
-        self.clauses = And() if knowledge is None else (knowledge.clauses if isinstance(knowledge, KnowledgeBase) else And(to_cnf(knowledge)))
-        self.clause_formulas = set()  # Track unique clause formulas
-        self.action_count = 0
-
-        # Initialize symbols
-        for x in range(1, self.width + 1):
-            for y in range(1, self.height + 1):
-                for obj in ['Wumpus', 'Pit', 'Stench', 'Breeze', 'Glitter', 'Bump', 'Scream']:
-                    self.symbols[(obj, y, x)] = Symbol(f'{obj}_{y}_{x}')
+        # (kind, y, x) -> Symbol, created on first use; the ids are the store's variables
+        self.symbols = SymbolTable(self.width, self.height)
+        self.symbols.update(symbols or {})
+        # Told sentence (in CNF) -> its conjuncts, each holding a reference in the store
+        self.told = {}
+        # Bumped on every add or remove. Cached answers are kept across
+        # versions until a change touches a variable they depend on, and
+        # the cache is only used while the KB is consistent.
+        self.version = 0
+        self.ask_cache = {}     # (query, strategy) -> (answer, version, dependencies)
+        self.cached_by = defaultdict(set)   # variable -> cache keys depending on it
+        self._dependencies = (None, {})
+        self._consistent = (None, None)
+        self._backbone = (None, None, None)
+        self._slicer = (None, None)
+        self._compiled = (None, None, None)
+        # Grid radius for the resolution engines' relevance slice (None: whole cone)
+        self.radius = None
+        # Local Breeze/Stench reasoning over the told unit facts: the fast path of ask
+        self.grid = GridPropagator(self.width, self.height)
+        template = None
+        if isinstance(knowledge, KnowledgeBase):
+            self.store = knowledge.store
+            for key, value in knowledge.grid.facts.items():
+                self.grid.tell(*key, value)
+        else:
+            template = AXIOM_TEMPLATES.get((N, is_advanced))
+            if template is None:
+                self.store = clause_db.ClauseStore(self.symbols)
+            else:
+                self.store = template[0].fork()
+                for key, value in template[1].items():
+                    self.grid.tell(*key, value)
+        # Persistent CDCL solver for the cdcl backend, ask_many and backbone
+        self.solver = sat_solver.IncrementalSolver(self)
+        # Action clock, normally the environment's. Told sentences about the
+        # current Wumpi are bucketed by the epoch at whose start they are
+        # re-indexed to the one before, so an epoch change reads only them.
+        self.owns_clock = clock is None
+        self.clock = clock if clock is not None else EpochClock(WUMPUS_MOVE_PERIOD if is_advanced else None)
+        self.clock.on_epoch(self.next_epoch)
+        self.expiry = defaultdict(list)     # epoch -> told sentences re-indexed when it starts
+        self.expires = {}                   # told sentence -> that epoch
+        # Time-indexed Wumpus fluents of the last few epochs
+        self.fluents = FluentWindow(self)
 
-        # Add initial knowledge
-        self.clauses.add(to_cnf(Not(self.symbols[('Wumpus', 1, 1)])))
-        self.clauses.add(to_cnf(Not(self.symbols[('Pit', 1, 1)])))
-        self.add_temporal_sentence()
+        # Add initial knowledge, or start from the shared copy of it
+        if template is None:
+            self.add_clauses(to_cnf(Not(self.symbols[('Wumpus', 1, 1)])))
+            self.add_clauses(to_cnf(Not(self.symbols[('Pit', 1, 1)])))
+            self.add_temporal_sentence()
+            if not isinstance(knowledge, KnowledgeBase):
+                AXIOM_TEMPLATES[(N, is_advanced)] = (self.store.fork(), dict(self.grid.facts))
+        if knowledge is not None and not isinstance(knowledge, KnowledgeBase):
+            self.add_clauses(knowledge)
         self.last_shot = None
         self.is_advanced = is_advanced
 
     def __iadd__(self, sentence):
-        sentence_cnf = to_cnf(sentence)
-        formula = sentence_cnf.formula()
-        if formula not in self.clause_formulas:
-            logging.info(f"Adding clause: {formula}")
-            self.clauses.add(sentence_cnf)
-            self.clause_formulas.add(formula)
+        sentence_cnf = _told_cnf(sentence)
+        if sentence_cnf not in self.told:
+            logging.info(f"Adding clause: {sentence_cnf.formula()}")
+            self.told[sentence_cnf] = self.add_clauses(sentence_cnf)
+        if self.clock.period and self._ephemeral(self.told[sentence_cnf]):
+            # Told (again) in this epoch: it describes the Wumpi until they move
+            epoch = self.clock.epoch + 1
+            self.expires[sentence_cnf] = epoch
+            self.expiry[epoch].append(sentence_cnf)
         return self
-    
+
+    @property
+    def action_count(self):
+        return self.clock.actions
+
+    def _ephemeral(self, conjuncts):
+        size = self.symbols.size
+        return any(var <= size and self.symbols.key(var)[0] in EPHEMERAL_KINDS
+                   for conjunct in conjuncts for var in self.store.variables(conjunct))
+
+    def next_epoch(self, epoch):
+        """The Wumpi moved: move what was told about them to fluents of the last epoch.
+
+        Costs O(re-indexed sentences) plus the window's upkeep (fluents):
+        only the bucket of `epoch` is read. A visited cell whose ¬Wumpus
+        fact is re-indexed is visited again, as far as
+        update_percept_sentence is concerned.
+        """
+        current = [sentence for sentence in self.expiry.pop(epoch, ())
+                   if self.expires.get(sentence) == epoch]
+        logging.info(f"Epoch {epoch}: {len(current)} Wumpus sentences re-indexed")
+        for sentence in current:
+            for conjunct in self.told.get(sentence, ()):
+                fact = _grid_fact(conjunct)
+                if fact and fact[0] == 'Wumpus' and not fact[3]:
+                    self.visited.discard(fact[1:3])
+        self.fluents.advance(epoch, current)
+
+    @property
+    def clauses(self):
+        """The KB as one And of its conjuncts."""
+        return And(*self.store.conjuncts())
+
+    @property
+    def clause_formulas(self):
+        """Formulas of the told sentences."""
+        return {sentence.formula() for sentence in self.told}
+
+    def add_clauses(self, sentence):
+        """Add the CNF conjuncts of a sentence to the store; returns them.
+
+        A conjunct already in the store only gets one more reference.
+        """
+        cnf = to_cnf(sentence)
+        conjuncts = flatten_and_clauses(cnf.conjuncts) if isinstance(cnf, And) else [cnf]
+        for conjunct in conjuncts:
+            if self.store.add(conjunct) is not None:
+                fact = _grid_fact(conjunct)
+                if fact:
+                    self.grid.tell(*fact)
+                self._changed(self.store.variables(conjunct))
+        return conjuncts
+
+    def _changed(self, variables):
+        """Bump the version and evict the cached answers that depend on `variables`.
+
+        Reads only the cache entries evicted, through self.cached_by.
+        """
+        self.version += 1
+        for var in variables:
+            for key in self.cached_by.pop(var, ()):
+                entry = self.ask_cache.pop(key, None)
+                for other in entry[2] if entry else ():
+                    keys = self.cached_by.get(other)
+                    if keys:
+                        keys.discard(key)
+
+    def _cache(self, key, answer):
+        dependencies = self.query_dependencies(key[0])
+        self.ask_cache[key] = (answer, self.version, dependencies)
+        for var in dependencies:
+            self.cached_by[var].add(key)
+
     def add_temporal_sentence(self):
         for x in range(1, self.width + 1):
             for y in range(1, self.height + 1):
-                self.clauses.add(to_cnf(Not(And(self.symbols[('Wumpus', y, x)], self.symbols[('Pit', y, x)]))))
-                wumpus_consequents = Or()
-                pit_consequents = Or()
+                self.add_clauses(to_cnf(Not(And(self.symbols[('Wumpus', y, x)], self.symbols[('Pit', y, x)]))))
+                wumpus_consequents = []
+                pit_consequents = []
                 if y > 1:
-                    wumpus_consequents.add(self.symbols[('Wumpus', y - 1, x)])
-                    pit_consequents.add(self.symbols[('Pit', y - 1, x)])
+                    wumpus_consequents.append(self.symbols[('Wumpus', y - 1, x)])
+                    pit_consequents.append(self.symbols[('Pit', y - 1, x)])
                 if y < self.height:
-                    wumpus_consequents.add(self.symbols[('Wumpus', y + 1, x)])
-                    pit_consequents.add(self.symbols[('Pit', y + 1, x)])
+                    wumpus_consequents.append(self.symbols[('Wumpus', y + 1, x)])
+                    pit_consequents.append(self.symbols[('Pit', y + 1, x)])
                 if x > 1:
-                    wumpus_consequents.add(self.symbols[('Wumpus', y, x - 1)])
-                    pit_consequents.add(self.symbols[('Pit', y, x - 1)])
+                    wumpus_consequents.append(self.symbols[('Wumpus', y, x - 1)])
+                    pit_consequents.append(self.symbols[('Pit', y, x - 1)])
                 if x < self.width:
-                    wumpus_consequents.add(self.symbols[('Wumpus', y, x + 1)])
-                    pit_consequents.add(self.symbols[('Pit', y, x + 1)])
-                if wumpus_consequents.disjuncts:
-                    self.clauses.add(to_cnf(Biconditional(self.symbols[('Stench', y, x)], wumpus_consequents)))
-                if pit_consequents.disjuncts:
-                    self.clauses.add(to_cnf(Biconditional(self.symbols[('Breeze', y, x)], pit_consequents)))
+                    wumpus_consequents.append(self.symbols[('Wumpus', y, x + 1)])
+                    pit_consequents.append(self.symbols[('Pit', y, x + 1)])
+                if wumpus_consequents:
+                    self.add_clauses(to_cnf(Biconditional(self.symbols[('Stench', y, x)], Or(*wumpus_consequents))))
+                if pit_consequents:
+                    self.add_clauses(to_cnf(Biconditional(self.symbols[('Breeze', y, x)], Or(*pit_consequents))))
 
     def update_action_sentence(self, agent, action, step):
         
@@ -65,21 +218,12 @@ class KnowledgeBase:
             # self.symbols[('Shoot', agent.location[0], agent.location[1], agent.direction.direction, step)] = shoot(agent.location, agent.direction.direction, step)
             # self += self.symbols[('Shoot', agent.location[0], agent.location[1], agent.direction.direction, step)]
             self.last_shot = (agent.location, agent.direction, step)
-        self.action_count += 1
-
-        # Thực hiện xong sẽ biết là đã 5 action đã qua.
-        if self.is_advanced and self.action_count > 0 and self.action_count % 5 == 0:
-            print('remove stench and not wumpus')
-            for (y, x) in list(self.visited):
-                if (y, x) != (1, 1):
-                    if f"{self.symbols[('Stench', y, x)].formula()}" in self.clause_formulas and \
-                            f"¬({self.symbols[('Wumpus', y, x)].formula()})" in self.clause_formulas:
-                        self.remove_clause(self.symbols[('Stench', y, x)])
-                        self.remove_clause(Not(self.symbols[('Wumpus', y, x)]))
-                        self.visited.remove((y, x))
-                        # self.clause_formulas.remove(f"{self.symbols[('Stench', y, x)].formula()}")
-                        # self.clause_formulas.remove(f"¬({self.symbols[('Wumpus', y, x)].formula()})")
-        
+        # The environment's clock was ticked when it executed the action; a
+        # KB without an environment keeps its own. When the Wumpi move, the
+        # tick that starts an epoch re-indexes the Stench/Wumpus facts (next_epoch).
+        if self.owns_clock:
+            self.clock.tick()
+
 
     def update_percept_sentence(self, pos, percepts):
         y, x = pos[:2]
@@ -104,27 +248,261 @@ class KnowledgeBase:
             for percept_type in [Glitter, Stench, Breeze, Bump]:
                 symbol_key = (percept_type.__name__, y, x)
                 if any(isinstance(percept, percept_type) for percept in percepts):
-                    if percept_type.__name__ == 'Stench' and f"¬({self.symbols[symbol_key].formula()})" in self.clause_formulas:
+                    if Not(self.symbols[symbol_key]) in self.told:
                         self.remove_clause(Not(self.symbols[symbol_key]))
                         # self.clause_formulas.remove(f"¬({self.symbols[symbol_key].formula()})")
                     self += self.symbols[symbol_key]
                 else:
                     if percept_type.__name__ not in ['Bump', 'Glitter']:
-                        if f"{self.symbols[symbol_key].formula()}" in self.clause_formulas:
+                        if self.symbols[symbol_key] in self.told:
                             self.remove_clause(self.symbols[symbol_key])
                             # self.clause_formulas.remove(f"{self.symbols[symbol_key].formula()}")
-                        # self += Not(self.symbols[symbol_key])
+                        # No breeze (stench): the grid propagator clears the neighbours
+                        self += Not(self.symbols[symbol_key])
 
     def remove_clause(self, sentence):
-        formula = to_cnf(sentence).formula()
-        if formula in self.clause_formulas:
-            logging.info(f"Remove clause: {formula}")
-            self.clause_formulas.remove(formula)
-            new_clauses = [c for c in self.clauses.conjuncts if c.formula() != formula]
-            self.clauses = And(*new_clauses) if new_clauses else And()
-
-    def ask(self, query):
-        return pl_resolution(self, query)
+        self.remove_clauses([sentence])
+
+    def remove_clauses(self, sentences):
+        """Retract told sentences.
+
+        Costs O(their conjuncts' clauses, the grid values derived from their
+        facts and the cached answers depending on their variables).
+        """
+        variables, facts = set(), []
+        for sentence in sentences:
+            sentence_cnf = _told_cnf(sentence)
+            added = self.told.pop(sentence_cnf, None)
+            if added is None:
+                continue
+            logging.info(f"Remove clause: {sentence_cnf.formula()}")
+            self.expires.pop(sentence_cnf, None)
+            for conjunct in added:
+                if conjunct not in self.store:
+                    continue
+                conjunct_variables = self.store.variables(conjunct)
+                # Another told sentence or an axiom may still hold it
+                if self.store.remove(conjunct) is None:
+                    continue
+                variables |= conjunct_variables
+                fact = _grid_fact(conjunct)
+                if fact:
+                    facts.append(fact[:3])
+        if variables:
+            self.grid.retract_all(facts)
+            self._changed(variables)
+
+    def ask(self, query, strategy=None):
+        """Return True if the KB entails the query.
+
+        `strategy` selects a resolution strategy of the integer engine
+        ('saturation' or 'set_of_support') instead of the KB's backend;
+        its pair and resolvent counts accumulate in self.stats.
+        Answers are cached until a change touches a variable they depend
+        on; hits and misses are counted in self.stats. While the KB is
+        inconsistent the cache is neither read nor written. Without a
+        strategy, queries the grid propagator settles skip both (counted
+        as 'fast_path'; the rest as 'fast_path_fallbacks'), and a miss whose
+        slice is small enough is decided on its truth table (counted as
+        'truth_table') before the backend is tried.
+        """
+        if strategy is not None and strategy not in clause_db.STRATEGIES:
+            raise ValueError(f"Unknown resolution strategy: {strategy}")
+        if strategy is None:
+            answer = self.fast_ask(query)
+            if answer is not None:
+                return answer
+        key = (query, strategy)
+        consistent = self.consistent()
+        entry = self.ask_cache.get(key) if consistent else None
+        if entry is not None:
+            self.stats['ask_hits'] += 1
+            return entry[0]
+        self.stats['ask_misses'] += 1
+        if strategy is not None:
+            answer = clause_db.entails(self, query, strategy)
+        else:
+            answer = self.truth_table_ask(query)
+            if answer is None:
+                answer = BACKENDS[self.backend](self, query)
+        if consistent:
+            self._cache(key, answer)
+        return answer
+
+    def consistent(self):
+        """True if the KB has a model; checked on the persistent solver once per version.
+
+        Everything follows from an inconsistent KB, and removing a clause
+        can make it consistent again whatever the variables involved, so
+        answers decided meanwhile are not cached.
+        """
+        version, result = self._consistent
+        if version != self.version:
+            result = self.solver.satisfiable()
+            self._consistent = (self.version, result)
+        return result
+
+    def truth_table_ask(self, query):
+        """Decide the query on the truth table of its slice, or None if that has too many symbols."""
+        answer = truth_table.entails(self, query)
+        if answer is not None:
+            self.stats['truth_table'] += 1
+        return answer
+
+    def fast_ask(self, query):
+        """Answer a literal, or an And of literals, from the grid propagator.
+
+        Returns None when the local rules do not settle it. Like the ask
+        cache this relies on the KB being consistent: a symbol the KB
+        entails to be true is not entailed to be false.
+        """
+        literals = query.conjuncts if isinstance(query, And) else [query]
+        answer = True
+        for literal in literals:
+            fact = _grid_fact(literal)
+            value = fact and self.grid.value(*fact[:3])
+            if value is None:
+                answer = None
+            elif value != fact[3]:
+                answer = False
+                break
+        self.stats['fast_path' if answer is not None else 'fast_path_fallbacks'] += 1
+        return answer
+
+    def fast_path_rate(self):
+        """Fraction of the queries asked without a strategy that the grid propagator settled."""
+        asks = self.stats['fast_path'] + self.stats['fast_path_fallbacks']
+        return self.stats['fast_path'] / asks if asks else 0.0
+
+    def ask_many(self, queries, strategy=None):
+        """Ask several queries at once; returns a dict query -> bool.
+
+        Queries that miss the cache are tried on their truth tables first;
+        with the cdcl backend the rest are decided together on the
+        persistent solver (IncrementalSolver.entails_many). The other
+        engines answer them one by one.
+        """
+        if strategy is not None and strategy not in clause_db.STRATEGIES:
+            raise ValueError(f"Unknown resolution strategy: {strategy}")
+        results = {}
+        misses = []
+        consistent = self.consistent()
+        for query in queries:
+            if strategy is None:
+                answer = self.fast_ask(query)
+                if answer is not None:
+                    results[query] = answer
+                    continue
+            entry = self.ask_cache.get((query, strategy)) if consistent else None
+            if entry is not None:
+                self.stats['ask_hits'] += 1
+                results[query] = entry[0]
+            elif query not in results:
+                misses.append(query)
+                results[query] = None
+        if not misses:
+            return results
+        self.stats['ask_misses'] += len(misses)
+        if strategy is not None:
+            answers = {query: clause_db.entails(self, query, strategy) for query in misses}
+        else:
+            answers = {query: self.truth_table_ask(query) for query in misses}
+            misses = [query for query, answer in answers.items() if answer is None]
+            if self.backend == 'cdcl':
+                answers.update(self.solver.entails_many(misses) if misses else {})
+            else:
+                answers.update({query: BACKENDS[self.backend](self, query) for query in misses})
+        for query, answer in answers.items():
+            results[query] = answer
+            if consistent:
+                self._cache((query, strategy), answer)
+        return results
+
+    def query_dependencies(self, query):
+        """Variables whose clauses can change the answer to `query` (see clause_db.dependencies)."""
+        version, dependencies = self._dependencies
+        if version != self.version:
+            dependencies = clause_db.dependencies(self.store.int_clauses)
+            self._dependencies = (self.version, dependencies)
+        result = set()
+        for name in query.symbols():
+            var = self.store.table.variable(name)
+            result |= dependencies.get(var, {var})
+        return frozenset(result)
+
+    def relevant_clauses(self, query_clauses):
+        """Slice of the KB's integer clauses relevant to an encoded negated query.
+
+        The KB is propagated and its definitional variables are eliminated
+        once per version (clause_db.RelevanceSlicer); each query then only
+        walks its own cone, cut at self.radius if that is set. Returns [()]
+        if the KB propagates to a conflict.
+        """
+        version, slicer = self._slicer
+        if version != self.version:
+            simplified = Propagator(self.store.int_clauses).simplify()
+            slicer = simplified and clause_db.RelevanceSlicer(*simplified, self.store.table.names)
+            self._slicer = (self.version, slicer)
+        if slicer is None:
+            return [()]
+        return slicer.slice(query_clauses, self.radius)
+
+    def backbone(self, kinds=('Pit', 'Wumpus')):
+        """Every entailed literal over the symbols of the given kinds.
+
+        Returns a dict (kind, y, x) -> the value the KB entails for it, or
+        None if the KB is inconsistent. Computed on the persistent CDCL
+        solver (IncrementalSolver.backbone) whatever the backend, and kept
+        until the next change to the KB.
+        """
+        kinds = tuple(kinds)
+        version, cached_kinds, result = self._backbone
+        if version == self.version and cached_kinds == kinds:
+            return result
+        table = self.store.table
+        keys = {}
+        for kind in kinds:
+            for y in range(1, self.height + 1):
+                for x in range(1, self.width + 1):
+                    var = table.ids.get(self.symbols.name((kind, y, x)))
+                    if var is not None:
+                        keys[var] = (kind, y, x)
+        literals = self.solver.backbone(keys)
+        if literals is None:
+            result = None
+        else:
+            result = {keys[abs(lit)]: lit > 0 for lit in literals}
+        self._backbone = (self.version, kinds, result)
+        return result
+
+    def cell_masks(self):
+        """Per-cell safe, unsafe and unknown masks from the backbone.
+
+        Each mask is a grid of booleans indexed [y - 1][x - 1]. A cell is
+        safe when the KB entails neither a pit nor a Wumpus there, unsafe
+        when it entails either, and unknown otherwise. Every cell is
+        unknown while the KB is inconsistent.
+        """
+        entailed = self.backbone(('Pit', 'Wumpus')) or {}
+        safe = [[False] * self.width for _ in range(self.height)]
+        unsafe = [[False] * self.width for _ in range(self.height)]
+        unknown = [[False] * self.width for _ in range(self.height)]
+        for y in range(1, self.height + 1):
+            for x in range(1, self.width + 1):
+                pit = entailed.get(('Pit', y, x))
+                wumpus = entailed.get(('Wumpus', y, x))
+                if pit or wumpus:
+                    unsafe[y - 1][x - 1] = True
+                elif pit is False and wumpus is False:
+                    safe[y - 1][x - 1] = True
+                else:
+                    unknown[y - 1][x - 1] = True
+        return safe, unsafe, unknown
+
+    def cache_hit_rate(self):
+        """Fraction of asks answered from the ask cache."""
+        asks = self.stats['ask_hits'] + self.stats['ask_misses']
+        return self.stats['ask_hits'] / asks if asks else 0.0
     
     def get_clause_formulas(self):
         return list(self.clause_formulas)
@@ -132,13 +510,74 @@ class KnowledgeBase:
         """
         update knowledge base
         """
-        self.clause_formulas = new_clause
+        self.told = {sentence: added for sentence, added in self.told.items()
+                     if sentence.formula() in new_clause}
         
     
 
 
-def build_init_kb(N, environment, is_advanced=False):
-    kb = KnowledgeBase(N=N, is_advanced=is_advanced)  # Set single_wumpus=True for exactly one Wumpus
+def _told_cnf(sentence):
+    """CNF under which a sentence is told and retracted."""
+    try:
+        return to_cnf(sentence)
+    except ValueError:
+        # Or over several Ands: fall back to the Tseitin encoding
+        return to_cnf(sentence, tseitin=True)
+
+
+def _grid_fact(sentence):
+    """(kind, y, x, value) for a literal over a grid symbol, otherwise None."""
+    positive = not isinstance(sentence, Not)
+    symbol = sentence if positive else sentence.operand
+    if not isinstance(symbol, Symbol):
+        return None
+    parts = symbol.name.split('_')
+    if len(parts) != 3 or not (parts[1].isdigit() and parts[2].isdigit()):
+        return None
+    return parts[0], int(parts[1]), int(parts[2]), positive
+
+
+@lru_cache(maxsize=None)
+def _axiom_digest():
+    """Hash of the code that generates a board's initial knowledge."""
+    return kb_cache.generator_hash(KnowledgeBase.__init__, KnowledgeBase.add_clauses,
+                                   KnowledgeBase.add_temporal_sentence, logic, SymbolTable)
+
+
+def load_axiom_template(N, is_advanced=False, cache_dir=None):
+    """Make sure AXIOM_TEMPLATES has the initial knowledge of an N x N board.
+
+    It is read from the kb_cache file in `cache_dir` (default
+    kb_cache.default_directory(), i.e. $WUMPUS_KB_CACHE) when that is valid
+    for the current axiom generator; otherwise it is built and the file
+    (re)written. Without a directory the template is only built.
+    """
+    key = (N, is_advanced)
+    if key in AXIOM_TEMPLATES:
+        return
+    directory = cache_dir if cache_dir is not None else kb_cache.default_directory()
+    if directory is None:
+        return
+    file_path = kb_cache.path(directory, N, is_advanced)
+    store = clause_db.ClauseStore(SymbolTable(N, N))
+    if kb_cache.load(file_path, N, is_advanced, _axiom_digest(), store):
+        grid = GridPropagator(N, N)
+        for conjunct in store.conjuncts():
+            fact = _grid_fact(conjunct)
+            if fact:
+                grid.tell(*fact)
+        AXIOM_TEMPLATES[key] = (store, dict(grid.facts))
+        return
+    KnowledgeBase(N=N, is_advanced=is_advanced)
+    try:
+        kb_cache.save(file_path, AXIOM_TEMPLATES[key][0], N, is_advanced, _axiom_digest())
+    except OSError as error:
+        logging.warning(f"Could not write the KB cache {file_path}: {error}")
+
+
+def build_init_kb(N, environment, is_advanced=False, backend='resolution', cache_dir=None):
+    load_axiom_template(N, is_advanced, cache_dir)
+    kb = KnowledgeBase(N=N, is_advanced=is_advanced, backend=backend, clock=environment.clock)  # Set single_wumpus=True for exactly one Wumpus
     percepts = environment.percept((1, 1))
     kb.update_percept_sentence((1, 1), percepts)
     return kb
\ No newline at end of file
@@ -1,8 +1,58 @@
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import count
+
+
 class Sentence:
+    """Base class of logical sentences.
+
+    Sentences built only from symbols and other interned sentences are
+    hash-consed: structurally equal ones are the same object, so equality is
+    an identity check and the hash and formula string are computed once.
+    Each interned class keeps a weak table from its operands to the live
+    instance. Interned sentences are immutable (build an Or from a list).
+    And is the exception; it is the mutable conjunction the KB grows with
+    `add`, so it and anything containing it are compared structurally.
+    """
+    __slots__ = ('_hash', '_formula', '_interned', '__weakref__')
+
+    @classmethod
+    def _register(cls, sentence, key, interned):
+        sentence._interned = interned
+        sentence._hash = hash((cls.__name__, key)) if interned else None
+        sentence._formula = None
+        if interned:
+            cls._table[key] = sentence
+        return sentence
+
+    def _key(self):
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if self._interned and getattr(other, '_interned', False):
+            return False
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self):
+        if self._hash is not None:
+            return self._hash
+        return hash(self._key())
+
     def evaluate(self, model):
         raise Exception("nothing to evaluate")
 
     def formula(self):
+        if self._formula is not None:
+            return self._formula
+        formula = self._build_formula()
+        if self._interned:
+            self._formula = formula
+        return formula
+
+    def _build_formula(self):
         return ""
 
     def symbols(self):
@@ -32,14 +82,19 @@ class Sentence:
         return f"({string})"
 
 class Symbol(Sentence):
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ('name',)
+    _table = weakref.WeakValueDictionary()
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def __new__(cls, name):
+        sentence = cls._table.get(name)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.name = name
+            cls._register(sentence, name, True)
+        return sentence
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def _key(self):
+        return (Symbol, self.name)
 
     def __repr__(self):
         return self.name
@@ -57,15 +112,21 @@ class Symbol(Sentence):
         return {self.name}
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ('operand',)
+    _table = weakref.WeakValueDictionary()
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        interned = operand._interned
+        sentence = cls._table.get(operand) if interned else None
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.operand = operand
+            cls._register(sentence, operand, interned)
+        return sentence
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def _key(self):
+        return (Not, self.operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -73,31 +134,32 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def _build_formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
         return self.operand.symbols()
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ('conjuncts',)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        sentence = object.__new__(cls)
+        sentence.conjuncts = list(conjuncts)
+        return cls._register(sentence, None, False)
 
-    def __hash__(self):
-        return hash(("and", tuple(hash(conjunct) for conjunct in self.conjuncts)))
+    def _key(self):
+        return (And, tuple(self.conjuncts))
 
     def __repr__(self):
         conjunctions = ", ".join([str(conjunct) for conjunct in self.conjuncts])
         return f"And({conjunctions})"
 
-    def add(self, conjunct):
+    def add(self, conjunct, tseitin=False):
         Sentence.validate(conjunct)
-        conjunct = to_cnf(conjunct)
+        conjunct = to_cnf(conjunct, tseitin)
         if conjunct in self.conjuncts:
             return
         if isinstance(conjunct, And):
@@ -108,7 +170,7 @@ class And(Sentence):
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def _build_formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " \n ".join([Sentence.parenthesize(conjunct.formula()) for conjunct in self.conjuncts])
@@ -117,29 +179,32 @@ class And(Sentence):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ('disjuncts',)
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, *disjuncts):
+        interned = True
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+            interned = interned and disjunct._interned
+        sentence = cls._table.get(disjuncts) if interned else None
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.disjuncts = disjuncts
+            cls._register(sentence, disjuncts, interned)
+        return sentence
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(("or", tuple(hash(disjunct) for disjunct in self.disjuncts)))
+    def _key(self):
+        return (Or, self.disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
-    def add(self, disjunct):
-        Sentence.validate(disjunct)
-        self.disjuncts.append(disjunct)
-
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def _build_formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨ ".join([Sentence.parenthesize(disjunct.formula()) for disjunct in self.disjuncts])
@@ -148,19 +213,24 @@ class Or(Sentence):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ('antecedent', 'consequent')
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication) and
-                self.antecedent == other.antecedent and
-                self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        key = (antecedent, consequent)
+        interned = antecedent._interned and consequent._interned
+        sentence = cls._table.get(key) if interned else None
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+            cls._register(sentence, key, interned)
+        return sentence
+
+    def _key(self):
+        return (Implication, self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -168,7 +238,7 @@ class Implication(Sentence):
     def evaluate(self, model):
         return (not self.antecedent.evaluate(model)) or self.consequent.evaluate(model)
 
-    def formula(self):
+    def _build_formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
@@ -177,19 +247,24 @@ class Implication(Sentence):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ('left', 'right')
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional) and
-                self.left == other.left and
-                self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        key = (left, right)
+        interned = left._interned and right._interned
+        sentence = cls._table.get(key) if interned else None
+        if sentence is None:
+            sentence = object.__new__(cls)
+            sentence.left = left
+            sentence.right = right
+            cls._register(sentence, key, interned)
+        return sentence
+
+    def _key(self):
+        return (Biconditional, self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -198,7 +273,7 @@ class Biconditional(Sentence):
         return ((self.left.evaluate(model) and self.right.evaluate(model)) or
                 (not self.left.evaluate(model) and not self.right.evaluate(model)))
 
-    def formula(self):
+    def _build_formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
@@ -242,67 +317,119 @@ def flatten_or(sent):
         return Not(flatten_or(sent.operand))
     return sent
 
-def to_cnf(sentence):
-    def eliminate_implications(sent):
-        if isinstance(sent, Implication):
-            antecedent = eliminate_implications(sent.antecedent)
-            consequent = eliminate_implications(sent.consequent)
-            return Or(Not(antecedent), consequent)
-        elif isinstance(sent, Biconditional):
-            left = eliminate_implications(sent.left)
-            right = eliminate_implications(sent.right)
-            return And(Or(Not(left), right), Or(Not(right), left))
-        elif hasattr(sent, 'conjuncts'):
-            return And(*[eliminate_implications(c) for c in sent.conjuncts])
-        elif hasattr(sent, 'disjuncts'):
-            return Or(*[eliminate_implications(d) for d in sent.disjuncts])
-        elif isinstance(sent, Not):
-            operand = eliminate_implications(sent.operand)
-            return Not(operand)
-        return sent
-
-    def move_not_inwards(sent):
-        if isinstance(sent, Not):
-            operand = sent.operand
-            if isinstance(operand, Not):
-                return move_not_inwards(operand.operand)
-            elif isinstance(operand, And):
-                return Or(*[move_not_inwards(Not(c)) for c in operand.conjuncts])
-            elif isinstance(operand, Or):
-                return And(*[move_not_inwards(Not(d)) for d in operand.disjuncts])
-            return sent
-        elif hasattr(sent, 'conjuncts'):
-            return And(*[move_not_inwards(c) for c in sent.conjuncts])
-        elif hasattr(sent, 'disjuncts'):
-            return Or(*[move_not_inwards(d) for d in sent.disjuncts])
-        return sent
-
-    def distribute_or_over_and(sent):
-        if isinstance(sent, Symbol) or (isinstance(sent, Not) and isinstance(sent.operand, Symbol)):
-            return sent
-        if isinstance(sent, Or):
-            disjuncts = [distribute_or_over_and(d) for d in sent.disjuncts]
-            and_clauses = [d for d in disjuncts if isinstance(d, And)]
-            if not and_clauses:
-                return Or(*disjuncts)
-            if len(and_clauses) > 1:
+CNF_CACHE_SIZE = 8192
+
+@lru_cache(maxsize=CNF_CACHE_SIZE)
+def to_cnf(sentence, tseitin=False):
+    """Convert a sentence to CNF in a single traversal.
+
+    Implications are eliminated, negations pushed inwards and Or distributed
+    over And while walking the sentence once, tracking the polarity of each
+    node. Distribution only handles one multi-clause disjunct per Or; with
+    tseitin=True the others are replaced by auxiliary symbols instead, so
+    the result is equisatisfiable and linear in the size of the sentence.
+    Results are memoized by structure in a bounded LRU cache; to_cnf returns
+    shared objects, so callers must not mutate them.
+    """
+    definitions = []
+
+    def disjoin(parts):
+        multi = [part for part in parts if len(part) > 1]
+        if any(not part for part in parts):
+            return []  # a true disjunct
+        if len(multi) > 1:
+            if not tseitin:
                 raise ValueError("Multiple And clauses in Or not supported yet")
-            base_and = and_clauses[0]
-            other_disjuncts = [d for d in disjuncts if d != base_and]
-            return And(*[Or(*[distribute_or_over_and(c)] + other_disjuncts)
-                         for c in base_and.conjuncts])
-        elif isinstance(sent, And):
-            return And(*[distribute_or_over_and(c) for c in sent.conjuncts])
-        return sent
-
-    sent = flatten_or(sentence)
-    sent = eliminate_implications(sent)
-    sent = flatten_or(sent)
-    sent = move_not_inwards(sent)
-    sent = flatten_or(sent)
-    sent = distribute_or_over_and(sent)
-    sent = flatten_or(sent)
-    return sent
+            parts = [[(tseitin_literal(part, definitions),)] if len(part) > 1 else part
+                     for part in parts]
+            multi = []
+        others = tuple(lit for part in parts if len(part) == 1 for lit in part[0])
+        if not multi:
+            return [others]
+        # As before, the clauses of the distributed disjunct come first
+        return [clause + others for clause in multi[0]]
+
+    def conjoin(parts):
+        return [clause for part in parts for clause in part]
+
+    # Post-order walk with an explicit stack; each frame is (node, positive, expanded)
+    stack = [(sentence, True, False)]
+    values = []
+    while stack:
+        node, positive, expanded = stack.pop()
+        if isinstance(node, Symbol):
+            values.append([(node if positive else Not(node),)])
+            continue
+        if isinstance(node, Not):
+            stack.append((node.operand, not positive, False))
+            continue
+        if isinstance(node, (And, Or)):
+            children = [(c, positive) for c in (node.conjuncts if isinstance(node, And) else node.disjuncts)]
+        elif isinstance(node, Implication):
+            children = [(node.antecedent, not positive), (node.consequent, positive)]
+        elif isinstance(node, Biconditional):
+            left, right = node.left, node.right
+            if positive:   # (¬l ∨ r) ∧ (¬r ∨ l)
+                children = [(left, False), (right, True), (right, False), (left, True)]
+            else:          # (l ∨ r) ∧ (¬l ∨ ¬r)
+                children = [(left, True), (right, True), (left, False), (right, False)]
+        else:
+            raise TypeError(f"Cannot convert to CNF: {node}")
+        if not expanded:
+            stack.append((node, positive, True))
+            stack.extend((child, pol, False) for child, pol in reversed(children))
+            continue
+        parts = values[len(values) - len(children):]
+        del values[len(values) - len(children):]
+        if isinstance(node, Biconditional):
+            values.append(disjoin(parts[:2]) + disjoin(parts[2:]))
+        elif isinstance(node, Implication) or isinstance(node, Or):
+            values.append(disjoin(parts) if positive else conjoin(parts))
+        else:
+            values.append(conjoin(parts) if positive else disjoin(parts))
+
+    clauses = list(dict.fromkeys(values.pop() + definitions))
+    clauses = [c[0] if len(c) == 1 else Or(*c) for c in clauses]
+    return clauses[0] if len(clauses) == 1 else And(*clauses)
+
+
+# Auxiliary symbol per conjunction of clauses, and per clause of it with
+# several literals. Each one is defined by an equivalence, so sentences
+# converted separately can share it safely, and it is a function of the
+# original symbols: model counts over the KB stay exact. The names are
+# kept in an LRU table bounded like the to_cnf cache; a key that falls out
+# gets a fresh name next time, and numbers are never reused, so a name
+# already in some KB never stands for another definition.
+tseitin_names = OrderedDict()
+tseitin_numbers = count(1)
+
+def tseitin_symbol(key):
+    name = tseitin_names.get(key)
+    if name is None:
+        name = f"_T{next(tseitin_numbers)}"
+        tseitin_names[key] = name
+        if len(tseitin_names) > CNF_CACHE_SIZE:
+            tseitin_names.popitem(last=False)
+    else:
+        tseitin_names.move_to_end(key)
+    return Symbol(name)
+
+def tseitin_literal(clauses, definitions):
+    parts = []
+    for clause in clauses:
+        if len(clause) == 1:
+            parts.append(clause[0])
+            continue
+        aux = tseitin_symbol(clause)
+        # aux <=> l1 ∨ ... ∨ lk
+        definitions.append((Not(aux),) + clause)
+        definitions.extend((aux, negation(lit)) for lit in clause)
+        parts.append(aux)
+    aux = tseitin_symbol(tuple(clauses))
+    # aux <=> p1 ∧ ... ∧ pn
+    definitions.extend((Not(aux), part) for part in parts)
+    definitions.append((aux,) + tuple(negation(part) for part in parts))
+    return aux
 
 def negation(literal):
     if isinstance(literal, Symbol):
@@ -392,8 +519,17 @@ def flatten_and_clauses(clauses):
     return result
 
 def pl_resolution(kb, query, max_iterations=1000):
-    """Implement resolution refutation with improved unit propagation."""
-    clauses = flatten_and_clauses(kb.clauses.conjuncts)
+    """Implement resolution refutation with improved unit propagation.
+
+    Only the clauses relevant to the query (KnowledgeBase.relevant_clauses)
+    are resolved.
+    """
+    table = kb.store.table
+    relevant = kb.relevant_clauses(table.encode(Not(query)))
+    if () in relevant:
+        return True
+    kb.stats['clauses'] += len(relevant)
+    clauses = [table.decode_clause(clause) for clause in relevant]
     negate_query = to_cnf(Not(query))
     if isinstance(negate_query, And):
         clauses.extend(flatten_and_clauses(negate_query.conjuncts))
@@ -422,8 +558,19 @@ def pl_resolution(kb, query, max_iterations=1000):
     iteration = 0
     while iteration < max_iterations:
         # print(f"\nIteration {iteration}: {len(clauses)} clauses")
-        n = len(clauses)
-        pairs = [(clauses[i], clauses[j]) for i in range(n) for j in range(i + 1, n)]
+        # Index clauses by literal so each clause only meets clauses holding
+        # a complementary literal instead of every other clause
+        by_literal = {}
+        for j, clause in enumerate(clauses):
+            for lit in (clause.disjuncts if isinstance(clause, Or) else [clause]):
+                by_literal.setdefault(lit, []).append(j)
+        pairs = []
+        for i, ci in enumerate(clauses):
+            partners = set()
+            for lit in (ci.disjuncts if isinstance(ci, Or) else [ci]):
+                if isinstance(lit, (Symbol, Not)):
+                    partners.update(j for j in by_literal.get(negation(lit), []) if j > i)
+            pairs.extend((ci, clauses[j]) for j in sorted(partners))
         
         for (ci, cj) in pairs:
             resolvents = pl_resolve(ci, cj)
@@ -466,4 +613,42 @@ def pl_resolution(kb, query, max_iterations=1000):
         iteration += 1
     
     print(f"Reached max iterations ({max_iterations}).")
-    return False
\ No newline at end of file
+    return False
+
+def count_models(kb, assumptions=(), priors=None, cache=None):
+    """Weighted number of models of the KB in which the assumptions hold.
+
+    Counted over the KB's variables and those of the assumptions (#DPLL
+    with component caching, see model_count). `priors` maps a symbol kind
+    such as 'Pit' to the probability that a symbol of that kind is true;
+    the others weigh 1 either way, so without priors this is the plain
+    model count. Breeze and Stench are fixed by the pits and Wumpi around
+    them, so with priors on both the count is the probability of the
+    world agreeing with the KB, up to a constant factor. Pass the same
+    `cache` to calls with the same priors.
+    """
+    import model_count
+    table = kb.store.table
+    clauses = list(kb.store.int_clauses)
+    for sentence in assumptions:
+        clauses.extend(table.encode(sentence))
+    variables = {abs(lit) for clause in clauses for lit in clause}
+    return model_count.count(clauses, model_count.prior_weights(table, priors), variables, cache)
+
+
+def marginals(kb, queries, priors=None):
+    """Probability of each query given the KB: count_models with it over count_models without.
+
+    The KB is simplified once for all the queries (model_count.count_each).
+    Returns a dict query -> probability, or query -> None if the KB has no
+    models.
+    """
+    import model_count
+    table = kb.store.table
+    clauses = kb.store.int_clauses
+    extras = [table.encode(query) for query in queries]
+    counts = model_count.count_each(clauses, extras, model_count.prior_weights(table, priors))
+    total = counts[0]
+    if not total:
+        return dict.fromkeys(queries)
+    return {query: value / total for query, value in zip(queries, counts[1:])}
@@ -0,0 +1,263 @@
+"""
+Weighted model counting over integer clauses (#DPLL).
+
+Every variable has a weight for each value (1 and 1 unless a prior is given),
+and the weighted count of a clause set sums, over its models, the product of
+the weights of the values the model assigns. The counter propagates units,
+splits the clause set into variable-disjoint components whose counts
+multiply, caches the count of every component it has seen, and branches on
+the variable that occurs most often. Components over at most
+truth_table.MAX_COUNT_SYMBOLS variables are counted on their truth tables.
+
+Before searching, variables that are defined by their clauses and weigh 1
+either way are eliminated: an unobserved Breeze_y_x is fixed by the pits
+around it, so dropping its biconditional leaves the count unchanged. This
+cuts the grid into the small components around the observed cells.
+Literals and clauses follow the clause_db encoding.
+"""
+
+from collections import defaultdict
+
+from clause_db import pl_resolve, is_tautology
+from propagation import Propagator
+from sat_solver import Solver
+import truth_table
+
+
+def prior_weights(table, priors):
+    """Weights of the variables of a LiteralTable from priors by symbol kind.
+
+    `priors` maps a kind ('Pit', 'Wumpus') to the probability of such a
+    symbol being true; other variables keep weight 1 either way.
+    """
+    weights = {}
+    if priors:
+        for name, var in table.ids.items():
+            p = priors.get(name.split('_')[0])
+            if p is not None:
+                weights[var] = (p, 1 - p)
+    return weights
+
+
+def count(clauses, weights=None, variables=None, cache=None):
+    """Weighted model count of the clauses over `variables`.
+
+    `weights` maps a variable to (weight if true, weight if false). The
+    variables default to the ones in the clauses; any of them the clauses
+    leave unconstrained counts with both values. `cache` may be shared by
+    calls with the same weights.
+    """
+    weights = weights or {}
+    cache = {} if cache is None else cache
+    if variables is None:
+        variables = {abs(lit) for clause in clauses for lit in clause}
+    # A tautology constrains nothing, but would make its variable look defined
+    clauses = [clause for clause in clauses if not is_tautology(clause)]
+    simplified = Propagator(clauses).simplify()
+    if simplified is None:
+        return 0
+    units, rest = simplified
+    result = 1
+    for lit in units:
+        result *= _weight(weights, lit)
+    rest, defined = _eliminate_definitions(rest, weights)
+    remaining = {abs(lit) for clause in rest for lit in clause}
+    fixed = {abs(lit) for lit in units}
+    for var in set(variables) - remaining - fixed - defined:
+        result *= _total(weights, var)
+    return result * _count(frozenset(rest), weights, cache)
+
+
+def count_each(clauses, extras, weights=None, variables=None):
+    """Weighted counts of the clauses alone and with each list of `extras` added.
+
+    Returns [count of clauses] + [count of clauses + extra for each extra].
+    The clauses are propagated, their defined variables eliminated and their
+    components counted once; each extra is then counted against only the
+    components it touches. An extra that mentions an eliminated variable is
+    counted from scratch.
+    """
+    weights = weights or {}
+    if variables is None:
+        variables = {abs(lit) for clause in clauses for lit in clause}
+    variables = set(variables) | {abs(lit) for extra in extras for clause in extra for lit in clause}
+    clauses = [clause for clause in clauses if not is_tautology(clause)]
+    extras = [[clause for clause in extra if not is_tautology(clause)] for extra in extras]
+    simplified = Propagator(clauses).simplify()
+    if simplified is None:
+        return [0] * (len(extras) + 1)
+    units, rest = simplified
+    rest, defined = _eliminate_definitions(rest, weights)
+    assigned = set(units)
+    fixed = 1
+    for lit in units:
+        fixed *= _weight(weights, lit)
+    cache = {}
+    components = _components(rest)
+    values = [_count(component, weights, cache) for component in components]
+    owner = {abs(lit): index for index, component in enumerate(components)
+             for clause in component for lit in clause}
+    free = variables - set(owner) - {abs(lit) for lit in units} - defined
+
+    def outside(touched, touched_vars):
+        value = fixed
+        for index, component_value in enumerate(values):
+            if index not in touched:
+                value *= component_value
+        for var in free - touched_vars:
+            value *= _total(weights, var)
+        return value
+
+    results = [outside(set(), set())]
+    for extra in extras:
+        if any(abs(lit) in defined for clause in extra for lit in clause):
+            results.append(count(list(clauses) + list(extra), weights, variables, cache))
+            continue
+        reduced = [tuple(lit for lit in clause if -lit not in assigned)
+                   for clause in extra if not any(lit in assigned for lit in clause)]
+        if not all(reduced):
+            results.append(0)
+            continue
+        touched_vars = {abs(lit) for clause in reduced for lit in clause}
+        touched = {owner[var] for var in touched_vars if var in owner}
+        local = [clause for index in touched for clause in components[index]] + reduced
+        local_vars = {abs(lit) for clause in local for lit in clause}
+        results.append(outside(touched, touched_vars) * count(local, weights, local_vars, cache))
+    return results
+
+
+def _weight(weights, lit):
+    pair = weights.get(abs(lit))
+    if pair is None:
+        return 1
+    return pair[0] if lit > 0 else pair[1]
+
+
+def _total(weights, var):
+    pair = weights.get(var)
+    return 2 if pair is None else pair[0] + pair[1]
+
+
+def _eliminate_definitions(clauses, weights):
+    """Drop the clauses of variables that have exactly one value in every model of the rest.
+
+    A variable qualifies when it weighs 1 either way, all its resolvents are
+    tautologies (some value always works) and the clauses it occurs in
+    cannot be satisfied by both values at once (only one does). The clauses
+    must not be tautologies. Returns the remaining clauses and the set of
+    variables eliminated.
+    """
+    occurs = defaultdict(set)
+    for clause in clauses:
+        for lit in clause:
+            occurs[lit].add(clause)
+    live = set(clauses)
+    done = set()
+    pending = sorted({abs(lit) for lit in occurs}, reverse=True)
+    while pending:
+        var = pending.pop()
+        positive, negative = occurs[var], occurs[-var]
+        if var in done or var in weights or not positive or not negative:
+            continue
+        if len(positive) * len(negative) > 64:
+            continue
+        if not all(is_tautology(resolvent) for a in positive for b in negative
+                   for resolvent in pl_resolve(a, b)):
+            continue
+        rests = [tuple(lit for lit in clause if abs(lit) != var) for clause in positive | negative]
+        if Solver(rests).solve():
+            continue
+        done.add(var)
+        for clause in positive | negative:
+            live.discard(clause)
+            for lit in clause:
+                occurs[lit].discard(clause)
+                if abs(lit) != var:
+                    pending.append(abs(lit))
+    return [clause for clause in clauses if clause in live], done
+
+
+def _components(clauses):
+    parent = {}
+
+    def find(var):
+        root = var
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[var] != root:
+            parent[var], var = root, parent[var]
+        return root
+
+    for clause in clauses:
+        root = find(abs(clause[0]))
+        for lit in clause[1:]:
+            other = find(abs(lit))
+            if other != root:
+                parent[other] = root
+    groups = defaultdict(list)
+    for clause in clauses:
+        groups[find(abs(clause[0]))].append(clause)
+    return [frozenset(group) for group in groups.values()]
+
+
+def _count(clauses, weights, cache):
+    result = 1
+    for component in _components(clauses):
+        value = cache.get(component)
+        if value is None:
+            value = _count_component(component, weights, cache)
+            cache[component] = value
+        result *= value
+        if not result:
+            return 0
+    return result
+
+
+def _count_component(clauses, weights, cache):
+    occurrences = defaultdict(int)
+    for clause in clauses:
+        for lit in clause:
+            occurrences[abs(lit)] += 1
+    if len(occurrences) <= truth_table.MAX_COUNT_SYMBOLS:
+        return truth_table.weighted_count(clauses, weights, occurrences)
+    var = max(occurrences, key=occurrences.get)
+    total = 0
+    for lit in (var, -var):
+        assigned = _assign(clauses, lit)
+        if assigned is None:
+            continue
+        literals, rest = assigned
+        value = 1
+        for assigned_lit in literals:
+            value *= _weight(weights, assigned_lit)
+        remaining = {abs(other) for clause in rest for other in clause}
+        fixed = {abs(other) for other in literals}
+        for free in occurrences.keys() - remaining - fixed:
+            value *= _total(weights, free)
+        total += value * _count(rest, weights, cache)
+    return total
+
+
+def _assign(clauses, lit):
+    """Set a literal and propagate; returns (assigned literals, remaining clauses) or None."""
+    assigned = {lit}
+    while True:
+        rest = set()
+        units = []
+        for clause in clauses:
+            if any(other in assigned for other in clause):
+                continue
+            reduced = tuple(other for other in clause if -other not in assigned)
+            if not reduced:
+                return None
+            if len(reduced) == 1:
+                units.append(reduced[0])
+            else:
+                rest.add(reduced)
+        if not units:
+            return assigned, frozenset(rest)
+        for unit in units:
+            if -unit in assigned:
+                return None
+            assigned.add(unit)
+        clauses = rest
@@ -0,0 +1,160 @@
+"""
+Unit propagation with two watched literals.
+
+Every clause of two or more literals watches its first two positions. When a
+watched literal becomes false only the clauses watching it are visited, and a
+clause is touched again only if no other non-false literal can take over the
+watch. Occurrence lists keyed by literal give the clauses mentioning a literal,
+which is what the resolution engine needs to simplify after propagation.
+Literals and clauses follow the clause_db encoding.
+"""
+
+from collections import defaultdict
+
+
+class Propagator:
+    def __init__(self, clauses=()):
+        self.clauses = []
+        self.watches = defaultdict(list)  # literal -> clauses watching it
+        self.occurs = defaultdict(list)   # literal -> clauses containing it
+        self.assigns = {}                 # var -> bool
+        self.level = {}
+        self.reason = {}
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.ok = True
+        self.propagations = 0
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value(self, lit):
+        val = self.assigns.get(abs(lit))
+        if val is None:
+            return None
+        return val if lit > 0 else not val
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def add_clause(self, clause):
+        """Add a normalized, non-tautological clause at decision level 0.
+
+        Returns False once the clause set is known to be unsatisfiable.
+        """
+        self.cancel_until(0)
+        clause = list(clause)
+        if not self.ok:
+            return False
+        if not clause:
+            self.ok = False
+            return False
+        self.clauses.append(clause)
+        for lit in clause:
+            self.occurs[lit].append(clause)
+        # Watch non-false literals first; true ones before unassigned ones.
+        clause.sort(key=lambda lit: {True: 0, None: 1, False: 2}[self.value(lit)])
+        first = self.value(clause[0])
+        if first is False:
+            self.ok = False
+            return False
+        if len(clause) > 1:
+            self.attach(clause)
+            if first is None and self.value(clause[1]) is False:
+                self.assign(clause[0], clause)
+        elif first is None:
+            self.assign(clause[0], clause)
+        return True
+
+    def attach(self, clause):
+        """Watch the first two literals of a clause."""
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def assign(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = lit > 0
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def new_level(self):
+        self.trail_lim.append(len(self.trail))
+
+    def cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            del self.assigns[var]
+            del self.level[var]
+            del self.reason[var]
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = min(self.qhead, len(self.trail))
+
+    def propagate(self):
+        """Propagate the trail to fixpoint; returns a conflicting clause or None."""
+        value = self.value
+        watches = self.watches
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = watches[false_lit]
+            watches[false_lit] = kept = []
+            for i, clause in enumerate(watchers):
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = value(first)
+                if first_value:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false_lit
+                        watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is False:
+                        kept.extend(watchers[i + 1:])
+                        self.qhead = len(self.trail)
+                        if not self.trail_lim:
+                            self.ok = False
+                        return clause
+                    self.assign(first, clause)
+        return None
+
+    def simplify(self):
+        """Propagate at level 0 and simplify the clause set with the result.
+
+        Returns (units, clauses): the set of literals fixed by propagation and
+        the remaining clauses as sorted tuples with false literals removed.
+        Only clauses reached through the occurrence lists of assigned literals
+        are rewritten. Returns None if propagation finds a conflict.
+        """
+        self.cancel_until(0)
+        if not self.ok or self.propagate() is not None:
+            self.ok = False
+            return None
+        units = set(self.trail)
+        satisfied = set()
+        shortened = set()
+        for lit in self.trail:
+            satisfied.update(id(c) for c in self.occurs[lit])
+            shortened.update(id(c) for c in self.occurs[-lit])
+        clauses = []
+        seen = set()
+        for clause in self.clauses:
+            if id(clause) in satisfied:
+                continue
+            if id(clause) in shortened:
+                clause = [lit for lit in clause if -lit not in units]
+            clause = tuple(sorted(clause))
+            if clause not in seen:
+                seen.add(clause)
+                clauses.append(clause)
+        return units, clauses
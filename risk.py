@@ -0,0 +1,53 @@
+"""
+Risk estimates shared by the A* planners (astar, astar_advanced).
+
+A cell's risk is the probability of a pit or Wumpus there given the KB,
+from its models weighted by the environment's pit probability and Wumpus
+density (logic.marginals). A path's risk combines the risks of every cell
+it enters.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logic import Or, marginals
+
+MOVES = {"up": (1, 0), "down": (-1, 0), "right": (0, 1), "left": (0, -1)}
+
+
+def cell_risks(kb, env, positions) -> Optional[Dict[Tuple[int, int], float]]:
+    """Probability of a pit or Wumpus at each position given the KB.
+
+    Returns None without a KB or when the KB has no models.
+    """
+    if not kb or not positions:
+        return None
+    queries = {}
+    for y, x in positions:
+        pit, wumpus = ('Pit', y, x), ('Wumpus', y, x)
+        if pit in kb.symbols and wumpus in kb.symbols:
+            queries[(y, x)] = Or(kb.symbols[pit], kb.symbols[wumpus])
+    priors = {'Pit': env.pit_probability,
+              'Wumpus': env.k_wumpuses / (env.width * env.height)}
+    probabilities = marginals(kb, list(queries.values()), priors)
+    if any(value is None for value in probabilities.values()):
+        return None
+    return {pos: probabilities[query] for pos, query in queries.items()}
+
+
+def path_cells(start: Tuple[int, int], path: List[str]) -> List[Tuple[int, int]]:
+    """Cells entered by a path of moves ("up", "down", ...) from `start`."""
+    cells = []
+    y, x = start
+    for move in path:
+        dy, dx = MOVES[move]
+        y, x = y + dy, x + dx
+        cells.append((y, x))
+    return cells
+
+
+def path_risk(risks: Dict[Tuple[int, int], float], cells: Iterable[Tuple[int, int]]) -> float:
+    """Chance of stepping on a pit or Wumpus in one of the cells (treated as independent)."""
+    survival = 1.0
+    for cell in cells:
+        survival *= 1.0 - risks.get(cell, 0.0)
+    return round(1.0 - survival, 6)
@@ -0,0 +1,377 @@
+"""
+CDCL satisfiability solver over integer clauses.
+
+Clauses use the clause_db encoding (signed ints). The solver does unit
+propagation with two watched literals (propagation.Propagator), first-UIP
+conflict analysis with clause learning, non-chronological backjumping,
+activity-based branching and restarts. Entailment KB |= q is
+decided by checking that KB ∧ ¬q is unsatisfiable.
+"""
+
+import heapq
+from collections import defaultdict
+
+from logic import Not
+from clause_db import normalize_clause, is_tautology
+from propagation import Propagator
+
+
+class Solver(Propagator):
+    def __init__(self, clauses=()):
+        self.learnts = []
+        self.activity = {}
+        self.order = []  # heap of (-activity, var); stale entries are skipped
+        self.var_inc = 1.0
+        self.conflicts = 0
+        self.decisions = 0
+        self.model = None
+        self.phase = {}  # var -> value to try first; these vars are branched on first
+        self.guarded = defaultdict(list)  # guard literal -> clauses added under it
+        super().__init__(clauses)
+
+    def add_clause(self, clause):
+        """Add a clause at decision level 0; returns False once the formula is unsatisfiable."""
+        clause = normalize_clause(clause)
+        if is_tautology(clause):
+            return self.ok
+        for lit in clause:
+            var = abs(lit)
+            if var not in self.activity:
+                self.activity[var] = 0.0
+                heapq.heappush(self.order, (0.0, var))
+        return super().add_clause(clause)
+
+    def add_guarded(self, guard, clause):
+        """Add (¬guard ∨ clause) until retire(guard); `guard` must not be fixed true.
+
+        Every clause learnt from it holds ¬guard as well, so retire() can
+        drop them all and the guard can be used again.
+        """
+        clause = normalize_clause((-guard,) + tuple(clause))
+        if is_tautology(clause):
+            return
+        self.cancel_until(0)
+        for lit in clause:
+            var = abs(lit)
+            if var not in self.activity:
+                self.activity[var] = 0.0
+                heapq.heappush(self.order, (0.0, var))
+        clause = sorted(clause, key=lambda lit: {True: 0, None: 1, False: 2}[self.value(lit)])
+        self.guarded[guard].append(clause)
+        if len(clause) > 1:
+            self.attach(clause)
+            if self.value(clause[0]) is None and self.value(clause[1]) is False:
+                self.assign(clause[0], clause)
+        elif self.value(clause[0]) is None:
+            self.assign(clause[0], clause)
+
+    def retire(self, guard):
+        """Remove the clauses added under `guard` and those learnt from them."""
+        self.cancel_until(0)
+        doomed = self.guarded.pop(guard, [])
+        learnts = []
+        for clause in self.learnts:
+            (doomed if -guard in clause else learnts).append(clause)
+        self.learnts = learnts
+        ids = {id(clause) for clause in doomed}
+        for lit in {lit for clause in doomed if len(clause) > 1 for lit in clause[:2]}:
+            self.watches[lit] = [clause for clause in self.watches[lit] if id(clause) not in ids]
+        var = abs(guard)
+        if var in self.assigns:
+            # ¬guard was fixed at level 0, by those clauses alone
+            index = self.trail.index(-guard)
+            del self.trail[index]
+            del self.assigns[var], self.level[var], self.reason[var]
+            if index < self.qhead:
+                self.qhead -= 1
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            for v in self.activity:
+                self.activity[v] *= 1e-100
+            self.var_inc *= 1e-100
+            self.order = [(-a, v) for v, a in self.activity.items()]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def cancel_until(self, level):
+        if len(self.trail_lim) > level:
+            activity = self.activity
+            for lit in self.trail[self.trail_lim[level]:]:
+                var = abs(lit)
+                if var in activity:
+                    heapq.heappush(self.order, (-activity[var], var))
+        super().cancel_until(level)
+
+    def analyze(self, conflict):
+        """First-UIP conflict analysis; returns (learnt clause, backjump level)."""
+        level = len(self.trail_lim)
+        seen = set()
+        learnt = []
+        counter = 0
+        p = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause:
+                if q == p:
+                    continue
+                var = abs(q)
+                if var in seen or self.level[var] == 0:
+                    continue
+                seen.add(var)
+                self._bump(var)
+                if self.level[var] == level:
+                    counter += 1
+                else:
+                    learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            p = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(p)]
+        learnt.insert(0, -p)
+        back_level = max((self.level[abs(q)] for q in learnt[1:]), default=0)
+        return learnt, back_level
+
+    def pick_branch(self):
+        for var in self.phase:
+            if var not in self.assigns:
+                return var
+        order = self.order
+        while order:
+            key, var = heapq.heappop(order)
+            if var not in self.assigns and -key == self.activity[var]:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """Return True if the clauses are satisfiable under the assumption literals."""
+        self.model = None
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+        restart_limit = 100
+        conflicts_since_restart = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_since_restart += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, back_level = self.analyze(conflict)
+                self.cancel_until(back_level)
+                self.learnts.append(learnt)
+                if len(learnt) > 1:
+                    # Watch the asserting literal and the one assigned last.
+                    k = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+                    learnt[1], learnt[k] = learnt[k], learnt[1]
+                    self.attach(learnt)
+                self.assign(learnt[0], learnt)
+                self.var_inc /= 0.95
+                continue
+
+            if conflicts_since_restart >= restart_limit:
+                conflicts_since_restart = 0
+                restart_limit = int(restart_limit * 1.5)
+                self.cancel_until(0)
+                continue
+
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                lit = assumptions[level]
+                val = self.value(lit)
+                if val is False:
+                    self.cancel_until(0)
+                    return False
+                self.new_level()
+                if val is None:
+                    self.assign(lit, None)
+                continue
+
+            var = self.pick_branch()
+            if var is None:
+                self.model = dict(self.assigns)
+                self.cancel_until(0)
+                return True
+            self.decisions += 1
+            self.new_level()
+            # Most Wumpus symbols are false, so try the negative phase first.
+            self.assign(var if self.phase.get(var) else -var, None)
+
+
+def entails(kb, query):
+    """Decide KB |= query by refuting KB ∧ ¬query with the CDCL solver."""
+    store = kb.store
+    solver = Solver(store.int_clauses)
+    for clause in store.table.encode(Not(query)):
+        solver.add_clause(clause)
+    return not solver.solve()
+
+
+def entails_incremental(kb, query):
+    """Decide KB |= query on the KB's persistent solver (kb.solver)."""
+    return kb.solver.entails(query)
+
+
+class IncrementalSolver:
+    """A CDCL solver kept alive across the asks of one KnowledgeBase.
+
+    On each call only the store entries added or removed since the last
+    call are applied, and learnt clauses are kept. The conjuncts of told
+    sentences can be retracted, so each one is guarded by an activation
+    literal `_A<id>`: its clauses are loaded as (¬_A<id> ∨ clause) and
+    _A<id> is passed as an assumption. Retracting it adds the unit
+    ¬_A<id>, which also switches off every learnt clause derived from it.
+    The other conjuncts (the axioms) are loaded as they are; if one of
+    them is removed the solver is rebuilt from the store. A negated query
+    that is not a set of units is added under the guard `_Q` and removed
+    again, with what was learnt from it, once it is decided
+    (Solver.add_guarded, Solver.retire).
+    """
+
+    def __init__(self, kb):
+        self.kb = kb
+        self.rebuilds = 0
+        self.reset()
+
+    def reset(self):
+        self.solver = Solver()
+        self.loaded = 0         # store entries applied so far
+        self.guards = {}        # clause id -> activation var
+        self.permanent = 0      # unguarded conjuncts loaded
+        self.queries = 0
+
+    def sync(self):
+        """Apply the store changes; returns the activation literals to assume."""
+        store = self.kb.store
+        entries = store.entries
+        for clause_id, var in list(self.guards.items()):
+            if entries[clause_id] is None:
+                self.solver.add_clause((-var,))
+                del self.guards[clause_id]
+        new = sum(1 for entry in entries[self.loaded:] if entry is not None)
+        if len(store) != self.permanent + len(self.guards) + new:
+            # An axiom was removed: start over.
+            self.rebuilds += 1
+            self.reset()
+        if self.loaded < len(entries):
+            told = {conjunct for added in self.kb.told.values() for conjunct in added}
+            for clause_id in range(self.loaded, len(entries)):
+                entry = entries[clause_id]
+                if entry is None:
+                    continue
+                if entry[0] in told:
+                    var = store.table.variable(f'_A{clause_id}')
+                    self.guards[clause_id] = var
+                    for clause in entry[2]:
+                        self.solver.add_clause((-var,) + clause)
+                else:
+                    self.permanent += 1
+                    for clause in entry[2]:
+                        self.solver.add_clause(clause)
+            self.loaded = len(entries)
+        return list(self.guards.values())
+
+    def _satisfiable(self, base, clauses):
+        """Solve with `clauses` added for this call only."""
+        if all(len(clause) == 1 for clause in clauses):
+            return self.solver.solve(base + [clause[0] for clause in clauses])
+        self.queries += 1
+        var = self.kb.store.table.variable('_Q')
+        for clause in clauses:
+            self.solver.add_guarded(var, clause)
+        result = self.solver.solve(base + [var])
+        self.solver.retire(var)
+        return result
+
+    def satisfiable(self):
+        """Return True if the KB has a model."""
+        return self.solver.solve(self.sync())
+
+    def entails(self, query):
+        """Decide KB |= query by refuting KB ∧ ¬query."""
+        base = self.sync()
+        return not self._satisfiable(base, self.kb.store.table.encode(Not(query)))
+
+    def entails_many(self, queries):
+        """Decide KB |= q for several queries; returns a dict query -> bool.
+
+        Every model found is a model of the KB, so it also settles the
+        pending queries whose negation it satisfies. Branching is steered
+        towards the negations still open so that each model settles as
+        many of them as it can.
+        """
+        base = self.sync()
+        table = self.kb.store.table
+        negated = {query: table.encode(Not(query)) for query in queries}
+        solver = self.solver
+        if not solver.solve(base):
+            return {query: True for query in negated}
+        results = {}
+
+        def refute(model):
+            for query, clauses in negated.items():
+                if query not in results and all(
+                        any(model.get(abs(lit)) == (lit > 0) for lit in clause)
+                        for clause in clauses):
+                    results[query] = False
+
+        refute(solver.model)
+        for query, clauses in negated.items():
+            if query in results:
+                continue
+            if any(len(clause) == 1 and solver.value(clause[0]) is False for clause in clauses):
+                # Already refuted by the level-0 units.
+                results[query] = True
+                continue
+            solver.phase = {abs(clause[0]): clause[0] > 0
+                            for other in negated if other not in results
+                            for clause in negated[other] if len(clause) == 1}
+            if self._satisfiable(base, clauses):
+                results[query] = False
+                refute(solver.model)
+            else:
+                results[query] = True
+        solver.phase = {}
+        return results
+
+    def backbone(self, variables):
+        """Literals over `variables` that hold in every model of the KB.
+
+        The first model gives a candidate literal per variable, and each
+        candidate is then tested by solving under its negation. A model
+        found that way drops every candidate it flips (branching prefers
+        flipping them); an unsatisfiable check makes the candidate a
+        backbone literal. Returns None if the KB is unsatisfiable.
+        """
+        base = self.sync()
+        solver = self.solver
+        if not solver.solve(base):
+            return None
+        model = solver.model
+        candidates = {var if model.get(var) else -var for var in variables}
+        result = set()
+        while candidates:
+            lit = candidates.pop()
+            if solver.value(lit) is True:
+                result.add(lit)
+                continue
+            solver.phase = {abs(other): other < 0 for other in candidates}
+            if solver.solve(base + [-lit]):
+                model = solver.model
+                candidates = {other for other in candidates if model.get(abs(other), False) == (other > 0)}
+            else:
+                result.add(lit)
+        solver.phase = {}
+        return result
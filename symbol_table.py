@@ -0,0 +1,94 @@
+"""
+Lazily populated symbol table of the Wumpus grid.
+
+Every (kind, y, x) key of an N x N board has a dense integer id computed
+from the key itself, kind-major then row-major:
+
+    id = 1 + (kind_index * height + (y - 1)) * width + (x - 1)
+
+so the KB's LiteralTable can use it as the variable of the symbol without
+storing anything per cell. The Symbol object of a key is created the first
+time it is looked up. Other keys (not on the grid, or of other kinds) are
+stored as given, like in a dict.
+"""
+
+from collections.abc import MutableMapping
+
+from logic import Symbol
+
+KINDS = ('Wumpus', 'Pit', 'Stench', 'Breeze', 'Glitter', 'Bump', 'Scream')
+KIND_INDEX = {kind: index for index, kind in enumerate(KINDS)}
+
+
+class SymbolTable(MutableMapping):
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = len(KINDS) * width * height
+        self.created = {}       # grid key -> Symbol, filled on first use
+        self.extra = {}         # any other key -> value
+
+    def id(self, key):
+        """Dense integer id of a grid key, or None for any other key."""
+        if not (isinstance(key, tuple) and len(key) == 3):
+            return None
+        kind, y, x = key
+        index = KIND_INDEX.get(kind)
+        if index is None or not (isinstance(y, int) and isinstance(x, int)):
+            return None
+        if not (1 <= y <= self.height and 1 <= x <= self.width):
+            return None
+        return 1 + (index * self.height + (y - 1)) * self.width + (x - 1)
+
+    def key(self, var):
+        """The grid key of an id."""
+        index, rest = divmod(var - 1, self.width * self.height)
+        y, x = divmod(rest, self.width)
+        return KINDS[index], y + 1, x + 1
+
+    def name(self, key):
+        kind, y, x = key
+        return f'{kind}_{y}_{x}'
+
+    def id_of_name(self, name):
+        """Id of a symbol name such as 'Pit_2_3', or None if it is not a grid symbol."""
+        parts = name.split('_')
+        if len(parts) != 3 or not (parts[1].isdigit() and parts[2].isdigit()):
+            return None
+        return self.id((parts[0], int(parts[1]), int(parts[2])))
+
+    def __getitem__(self, key):
+        symbol = self.created.get(key)
+        if symbol is not None:
+            return symbol
+        if key in self.extra:
+            return self.extra[key]
+        if self.id(key) is None:
+            raise KeyError(key)
+        symbol = self.created[key] = Symbol(self.name(key))
+        return symbol
+
+    def __setitem__(self, key, value):
+        if self.id(key) is None:
+            self.extra[key] = value
+        else:
+            self.created[key] = value
+
+    def __delitem__(self, key):
+        if key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.extra or self.id(key) is not None
+
+    def __iter__(self):
+        for x in range(1, self.width + 1):
+            for y in range(1, self.height + 1):
+                for kind in KINDS:
+                    yield (kind, y, x)
+        yield from self.extra
+
+    def __len__(self):
+        return self.size + len(self.extra)
@@ -7,7 +7,8 @@ Tests the functionality of KnowledgeBase when is_advanced=True
 from knowledgeBase import KnowledgeBase, build_init_kb
 from environment import WumpusEnvironment
 from object import Stench, Breeze, Glitter, Bump, Scream
-from logic import Not
+from logic import Not, Or
+from fluents import fluent
 import logging
 
 # Set up logging
@@ -195,6 +196,52 @@ def test_action_counting_and_reset():
     
     print("✓ Action counting and reset test completed\n")
 
+def test_wumpus_fluents_follow_the_epochs():
+    """Stench/Wumpus facts become fluents of their epoch when the Wumpi move"""
+    env = WumpusEnvironment(N=4, K_wumpuses=1, pit_probability=0.0, advanced_setting=True)
+    kb = build_init_kb(4, env, is_advanced=True)
+    assert kb.clock is env.clock
+
+    # Epoch 0: (2, 2) and all its neighbours are visited, with a stench at (2, 3)
+    # only (the Wumpus of `env` may be anywhere, so (1, 1) is perceived again)
+    for pos in [(1, 1), (2, 2), (1, 2), (3, 2), (2, 1), (2, 3)]:
+        kb.update_percept_sentence(pos, [Stench()] if pos == (2, 3) else [])
+    print(f"Re-indexed at epoch 1: {[s.formula() for s in kb.expiry[1]]}")
+    for _ in range(5):
+        env.clock.tick()
+    assert env.clock.epoch == 1 and kb.action_count == 5
+
+    no_wumpus = Not(kb.symbols[('Wumpus', 2, 2)])
+    assert no_wumpus not in kb.told and Not(fluent('Wumpus', 2, 2, 0)) in kb.told
+    assert fluent('Stench', 2, 3, 0) in kb.told and (2, 2) not in kb.visited
+    # A Wumpus moves one cell at most, and none was around (2, 2) or (1, 2)...
+    assert kb.ask(no_wumpus) and kb.ask(Not(kb.symbols[('Wumpus', 1, 2)]))
+    # ...but the stench at (2, 3) came from (2, 4) or (3, 3), next to it
+    assert not kb.ask(Not(kb.symbols[('Wumpus', 2, 3)]))
+    assert kb.ask(Or(fluent('Wumpus', 2, 4, 0), fluent('Wumpus', 3, 3, 0)))
+
+    # No stench at (2, 2) every epoch keeps it clear, but two moves later the
+    # Wumpus could be anywhere else; old epochs are summarized and dropped
+    sizes = []
+    for epoch in range(2, 12):
+        kb.update_percept_sentence((2, 2), [])
+        for _ in range(5):
+            env.clock.tick()
+        sizes.append(len(kb.told))
+        assert not any(name.endswith(f'_{epoch - 3}') for s in kb.told for name in s.symbols()
+                       if name.count('_') == 3)
+    print(f"Told sentences per epoch: {sizes}, {kb.fluents.summarized} summary facts")
+    assert max(sizes[3:]) == min(sizes[3:])
+    assert kb.ask(Not(fluent('Wumpus', 2, 2, 10))) and kb.ask(no_wumpus)
+    assert not kb.ask(Not(kb.symbols[('Wumpus', 1, 3)]))
+
+    # Without an environment the KB ticks its own clock
+    kb = KnowledgeBase(N=4, is_advanced=True)
+    kb.update_percept_sentence((2, 1), [Stench()])
+    for step in range(5):
+        kb.update_action_sentence(None, 'Move', step)
+    assert kb.clock.epoch == 1 and fluent('Stench', 2, 1, 0) in kb.told
+
 def run_all_tests():
     """Run all advanced mode KB tests"""
     print("🚀 STARTING ADVANCED MODE KNOWLEDGE BASE TESTS")
@@ -207,6 +254,7 @@ def run_all_tests():
         test_wumpus_knowledge_advanced_mode()
         test_environment_integration()
         test_action_counting_and_reset()
+        test_wumpus_fluents_follow_the_epochs()
         
         print("🎉 ALL TESTS COMPLETED SUCCESSFULLY!")
         print("=" * 60)
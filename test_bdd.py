@@ -0,0 +1,49 @@
+from knowledgeBase import KnowledgeBase
+from object import Breeze, Stench
+from logic import Not, And, Or, marginals
+import bdd
+import model_count
+import sat_solver
+
+
+def test_bdd_operations():
+    manager = bdd.BDD([1, 2, 3, 4])
+    clauses = [(1, 2), (-1, -3), (3, 4)]
+    u = bdd.TRUE
+    for clause in clauses:
+        u = manager.conjoin(u, manager.clause(clause))
+    # Canonical: the same function built in another order is the same node.
+    v = bdd.TRUE
+    for clause in reversed(clauses):
+        v = manager.conjoin(manager.clause(clause), v)
+    assert u == v
+    weights = {1: (0.2, 0.8), 4: (0.3, 0.7)}
+    assert abs(manager.count(u, weights) - model_count.count(clauses, weights, [1, 2, 3, 4])) < 1e-9
+    assert manager.count(u) == model_count.count(clauses, None, [1, 2, 3, 4])
+    assert manager.conjoin(u, manager.restrict(manager.negate(manager.clause([1, 2])), [])) == bdd.FALSE
+
+
+def test_compiled_theory_matches_solver():
+    kb = KnowledgeBase(N=5, backend='bdd')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    kb += Not(kb.symbols[('Breeze', 1, 2)])
+    queries = [q for y in range(1, 6) for x in range(1, 6)
+               for q in (Not(kb.symbols[('Pit', y, x)]), kb.symbols[('Wumpus', y, x)],
+                         And(Not(kb.symbols[('Pit', y, x)]), Not(kb.symbols[('Wumpus', y, x)])))]
+    for query in queries:
+        assert bdd.entails(kb, query) == sat_solver.entails(kb, query)
+
+    priors = {'Pit': 0.2, 'Wumpus': 0.1}
+    cells = [Or(kb.symbols[('Pit', y, x)], kb.symbols[('Wumpus', y, x)]) for y in range(1, 4) for x in range(1, 4)]
+    compiled, counted = bdd.marginals(kb, cells, priors), marginals(kb, cells, priors)
+    print(compiled)
+    assert all(abs(compiled[q] - counted[q]) < 1e-9 for q in cells)
+    # The compiled theory is shared by every KB of the same size.
+    assert bdd.compiled(kb)[0] is bdd.compiled(KnowledgeBase(N=5))[0]
+
+    # Sentences beyond unit facts fall back to the solver.
+    kb += Or(kb.symbols[('Pit', 3, 3)], kb.symbols[('Pit', 4, 4)])
+    assert bdd.entails(kb, Not(kb.symbols[('Pit', 1, 1)])) is None
+    assert bdd.entails_or_solve(kb, Or(kb.symbols[('Pit', 3, 3)], kb.symbols[('Pit', 4, 4)]))
+    assert kb.stats['bdd_fallbacks'] > 0
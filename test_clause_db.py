@@ -0,0 +1,184 @@
+from collections import Counter
+
+from knowledgeBase import KnowledgeBase
+from object import Breeze
+from logic import Symbol, Not, And, Or, pl_resolution
+import clause_db
+
+
+def test_clause_helpers():
+    assert clause_db.normalize_clause([3, -1, 3, 2]) == (-1, 2, 3)
+    assert clause_db.is_tautology((-2, 1, 2))
+    assert not clause_db.is_tautology((-2, 1))
+    assert clause_db.simplify_clause((-1, 2, 3), {1}) == (2, 3)
+    assert clause_db.simplify_clause((-1, 2, 3), {2}) is None
+    assert clause_db.simplify_clause((-1,), {1}) == ()
+    assert clause_db.pl_resolve((1, 2), (-2, 3)) == [(1, 3)]
+    assert clause_db.pl_resolve((1,), (-1,)) == [()]
+
+
+def test_literal_table_round_trip():
+    table = clause_db.LiteralTable()
+    clause = table.encode_clause(Or(Symbol('A'), Not(Symbol('B'))))
+    assert clause == (-2, 1)
+    assert table.decode_clause(clause) == Or(Not(Symbol('B')), Symbol('A'))
+
+
+def test_int_engine_matches_string_engine():
+    kb = KnowledgeBase(N=4)
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [])
+    for query in [Symbol('Pit_2_1'), Not(Symbol('Pit_2_1')), Not(Symbol('Pit_1_2')), Not(Symbol('Wumpus_1_2'))]:
+        expected = pl_resolution(kb, query)
+        print(f"{query.formula()}: {expected}")
+        assert clause_db.entails(kb, query) == expected
+
+
+def test_clause_index_partners():
+    index = clause_db.ClauseIndex([(1, 2), (-1, 3), (2, 3), (-2, -3)])
+    assert index.partners((1, 2)) == {1, 3}
+    index.remove((-1, 3))
+    assert index.partners((1, 2)) == {3}
+    assert index.add((2, 3)) is None
+    assert index.add((-1, 4)) == 4
+    assert index.containing([4]) == [(-1, 4)]
+
+
+def test_set_of_support_strategy():
+    kb = KnowledgeBase(N=4)
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [])
+    assert kb.ask(Symbol('Pit_2_1'), strategy='set_of_support')
+    assert kb.ask(Not(Symbol('Wumpus_2_1')), strategy='set_of_support')
+    assert kb.ask(Not(Symbol('Pit_2_2')), strategy='set_of_support')
+    assert not kb.ask(Not(Symbol('Pit_3_1')), strategy='set_of_support')
+    print(f"set of support: {dict(kb.stats)}")
+    assert 'pairs' in kb.stats and kb.stats['clauses'] > 0
+
+    stats = Counter()
+    assert clause_db.sos_resolution([(1, 2), (-1, 2), (1, -2)], [(-1, -2)], stats=stats)
+    assert stats['pairs'] > 0 and stats['resolvents'] > 0
+
+    # Background axioms alone never seed the support set.
+    assert not clause_db.sos_resolution([(-1, 2), (-2, 3)], [(1,), (3,)])
+    assert clause_db.sos_resolution([(-1, 2), (-2, 3)], [(1,), (-3,)])
+
+
+def test_clause_index_subsumption():
+    index = clause_db.ClauseIndex([(1, 2, 3), (-1, 4), (2, 3, 5)])
+    assert index.is_subsumed((-1, 4, 6))
+    assert not index.is_subsumed((-1, 5))
+    assert sorted(index.subsumed_by((2, 3))) == [(1, 2, 3), (2, 3, 5)]
+    position, removed = index.insert((2, 3))
+    assert removed == 2 and len(index) == 2
+    assert index.insert((2, 3, 6)) == (None, 0)
+    assert index.partners((-2,)) == {position}
+
+
+def test_kb_clause_store_follows_updates():
+    from logic import flatten_and_clauses
+    from object import Stench
+    kb = KnowledgeBase(N=4, is_advanced=True, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    kb.update_percept_sentence((1, 2), [])
+    kb.remove_clause(Not(kb.symbols[('Wumpus', 1, 2)]))
+    # Removal reorders the flat lists
+    assert Counter(kb.store.clauses) == Counter(flatten_and_clauses(kb.clauses.conjuncts))
+    assert kb.store.int_clauses == kb.store.table.encode_all(kb.store.clauses)
+    assert Symbol('Stench_1_2') not in kb.store.clauses
+    assert kb.ask(Symbol('Wumpus_1_2')) is False
+
+
+def test_clause_store_ids_and_tombstones():
+    A, B = Symbol('A'), Symbol('B')
+    store = clause_db.ClauseStore()
+    assert store.add(A) == 0 and store.add(Or(Not(A), B)) == 1
+    assert store.add(A) is None and len(store) == 2
+    assert store.int_clauses == [(1,), (-1, 2)]
+    # A was added twice, so it takes two removals
+    assert store.remove(A) is None and A in store
+    assert store.remove(A) == 0 and store.remove(A) is None
+    assert store.entries[0] is None and A not in store
+    assert store.clauses == [Or(Not(A), B)] and store.int_clauses == [(-1, 2)]
+    assert store.add(A) == 2 and store.clauses == [Or(Not(A), B), A]
+
+    kb = KnowledgeBase(N=4)
+    kb += Symbol('Stench_1_2')
+    assert 'Stench_1_2' in kb.clause_formulas
+    kb.remove_clause(Symbol('Stench_1_2'))
+    assert 'Stench_1_2' not in kb.clause_formulas
+    assert Symbol('Stench_1_2') not in kb.store
+
+
+def test_told_conjuncts_are_reference_counted():
+    A, B, C = Symbol('A'), Symbol('B'), Symbol('C')
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    kb += And(A, B)
+    kb += And(B, C)
+    kb.remove_clause(And(A, B))
+    assert A not in kb.store and B in kb.store and kb.ask(B)
+    kb.remove_clause(And(B, C))
+    assert B not in kb.store and not kb.ask(B)
+
+    # Telling and retracting an axiom leaves it in place
+    no_pit = Not(kb.symbols[('Pit', 1, 1)])
+    kb += no_pit
+    kb.remove_clause(no_pit)
+    assert no_pit in kb.store and kb.ask(no_pit)
+
+
+def test_ask_cache_and_dependencies():
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    query = Not(kb.symbols[('Pit', 1, 2)])
+    assert not kb.ask(query) and not kb.ask(query)
+    assert kb.stats['ask_hits'] == 1 and kb.cache_hit_rate() == 0.5
+
+    # Glitter is unrelated to pits, so the answer stays cached
+    version = kb.version
+    kb += kb.symbols[('Glitter', 4, 4)]
+    assert kb.version == version + 1 and (query, None) in kb.ask_cache
+
+    # A fact next to the cell evicts it and the new answer is computed
+    kb += Not(kb.symbols[('Pit', 2, 1)])
+    assert (query, None) not in kb.ask_cache
+    assert kb.ask(Not(kb.symbols[('Pit', 1, 2)])) is False
+    assert kb.ask(kb.symbols[('Pit', 1, 2)]) is True
+
+
+def test_ask_cache_skips_an_inconsistent_kb():
+    for backend in ('cdcl', 'resolution'):
+        kb = KnowledgeBase(N=4, backend=backend)
+        kb += Symbol('X')
+        kb += Not(Symbol('X'))
+        query = Not(kb.symbols[('Pit', 3, 3)])
+        assert kb.ask(query) and kb.ask_many([query])[query]
+        assert (query, None) not in kb.ask_cache
+
+        kb.remove_clause(Not(Symbol('X')))
+        assert kb.ask(query) is False
+        assert kb.ask_many([query])[query] is False
+        assert kb.ask(query) is False and kb.stats['ask_hits'] == 2
+
+
+def test_relevance_slice():
+    kb = KnowledgeBase(N=6)
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [])
+    kb += Not(Symbol('Breeze_1_2'))
+    kb += Or(Symbol('Pit_4_4'), Symbol('Pit_6_6'))
+    kb += Or(Symbol('Pit_4_4'), Not(Symbol('Pit_6_6')))
+    table = kb.store.table
+    relevant = kb.relevant_clauses(table.encode(Not(Symbol('Pit_4_4'))))
+    print([table.decode_clause(c).formula() for c in relevant])
+    assert 0 < len(relevant) < len(kb.store.int_clauses) // 10
+    assert kb.ask(Symbol('Pit_2_1')) and kb.ask(Not(Symbol('Pit_2_2')))
+    assert not kb.ask(Not(Symbol('Pit_3_1')))
+    assert kb.ask(Symbol('Pit_4_4'))
+
+    # A radius cuts off clauses about distant cells: sound, but Pit_4_4
+    # needs the clauses on Pit_6_6, four cells away.
+    kb.radius = 2
+    assert kb.relevant_clauses(table.encode(Not(Symbol('Pit_4_4')))) == []
+    assert not kb.ask(Symbol('Pit_4_4'), strategy='saturation')
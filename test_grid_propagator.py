@@ -0,0 +1,60 @@
+from knowledgeBase import KnowledgeBase
+from object import Breeze, Stench
+from logic import Not, And
+from grid_propagator import GridPropagator
+import sat_solver
+
+
+def test_local_rules():
+    grid = GridPropagator(4, 4)
+    grid.tell('Breeze', 1, 1, True)
+    assert grid.value('Pit', 2, 1) is None
+    grid.tell('Pit', 1, 2, False)
+    assert grid.value('Pit', 2, 1) is True
+    assert grid.value('Wumpus', 2, 1) is False
+
+    grid.tell('Stench', 3, 3, False)
+    assert all(grid.value('Wumpus', y, x) is False for y, x in [(2, 3), (4, 3), (3, 2), (3, 4)])
+
+    # Retracting a fact drops what was derived from it.
+    grid.retract('Pit', 1, 2)
+    assert grid.value('Pit', 2, 1) is None
+    assert grid.value('Wumpus', 2, 3) is False
+
+
+def test_retraction_matches_a_replay():
+    # Percepts of a board with pits at (1, 3) and (3, 2) and a Wumpus at (3, 4)
+    pits, wumpi = {(1, 3), (3, 2)}, {(3, 4)}
+    grid = GridPropagator(4, 4)
+    facts = []
+    for y in range(1, 5):
+        for x in range(1, 5):
+            around = set(grid.neighbours(y, x))
+            facts += [('Breeze', y, x, bool(around & pits)), ('Stench', y, x, bool(around & wumpi))]
+            if (y, x) not in pits | wumpi:
+                facts += [('Pit', y, x, False), ('Wumpus', y, x, False)]
+    for fact in facts:
+        grid.tell(*fact)
+    for step, fact in enumerate(facts[::3]):
+        grid.retract(*fact[:3])
+        if step % 2:
+            grid.tell(*fact)
+        replay = GridPropagator(4, 4)
+        for key, value in grid.facts.items():
+            replay.tell(*key, value)
+        assert grid.values == replay.values and grid.open == replay.open
+
+
+def test_fast_path_matches_solver():
+    kb = KnowledgeBase(N=5, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    kb += Not(kb.symbols[('Breeze', 1, 2)])
+    queries = [q for y in range(1, 6) for x in range(1, 6)
+               for q in (Not(kb.symbols[('Pit', y, x)]), kb.symbols[('Wumpus', y, x)],
+                         And(Not(kb.symbols[('Pit', y, x)]), Not(kb.symbols[('Wumpus', y, x)])))]
+    for query in queries:
+        assert kb.ask(query) == sat_solver.entails(kb, query)
+    print(dict(kb.stats), kb.fast_path_rate())
+    assert kb.stats['fast_path'] > 0 and kb.stats['fast_path_fallbacks'] > 0
+    assert kb.ask(kb.symbols[('Pit', 2, 1)]) and kb.grid.value('Pit', 2, 1)
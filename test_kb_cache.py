@@ -0,0 +1,65 @@
+import os
+
+import kb_cache
+from knowledgeBase import KnowledgeBase, AXIOM_TEMPLATES, load_axiom_template, build_init_kb
+from environment import WumpusEnvironment
+from logic import Not
+from symbol_table import SymbolTable
+from clause_db import ClauseStore
+
+
+def test_template_round_trips_through_disk(tmp_path):
+    AXIOM_TEMPLATES.pop((5, False), None)
+    load_axiom_template(5, cache_dir=str(tmp_path))
+    built, built_facts = AXIOM_TEMPLATES.pop((5, False))
+    file_path = kb_cache.path(str(tmp_path), 5, False)
+    print(os.path.getsize(file_path), 'bytes for', len(built), 'conjuncts')
+
+    load_axiom_template(5, cache_dir=str(tmp_path))
+    loaded, loaded_facts = AXIOM_TEMPLATES[(5, False)]
+    assert loaded is not built
+    assert loaded.entries == built.entries and loaded.ids == built.ids
+    assert loaded.int_clauses == built.int_clauses and loaded_facts == built_facts
+
+    kb = build_init_kb(5, WumpusEnvironment(N=5), cache_dir=str(tmp_path))
+    assert kb.ask(Not(kb.symbols[('Pit', 1, 1)]))
+    assert len(KnowledgeBase(N=5).store) == len(loaded)
+
+
+def test_stale_cache_is_rebuilt(tmp_path):
+    AXIOM_TEMPLATES.pop((4, False), None)
+    load_axiom_template(4, cache_dir=str(tmp_path))
+    built = AXIOM_TEMPLATES.pop((4, False))[0]
+    file_path = kb_cache.path(str(tmp_path), 4, False)
+
+    # Another axiom generator: the file is not used, and is rewritten.
+    assert not kb_cache.load(file_path, 4, False, bytes(32), ClauseStore(SymbolTable(4, 4)))
+    with open(file_path, 'r+b') as f:
+        f.seek(kb_cache.HEADER.size - 1)
+        f.write(b'\0')
+    stamp = os.path.getmtime(file_path)
+    os.utime(file_path, (stamp - 10, stamp - 10))
+    load_axiom_template(4, cache_dir=str(tmp_path))
+    assert AXIOM_TEMPLATES[(4, False)][0].entries == built.entries
+    assert os.path.getmtime(file_path) > stamp - 10
+
+    # A file of another board size is not used either, whatever its name
+    other_path = kb_cache.path(str(tmp_path), 5, False)
+    os.replace(file_path, other_path)
+    with open(other_path, 'rb') as f:
+        digest = kb_cache.HEADER.unpack_from(f.read())[-1]
+    assert not kb_cache.load(other_path, 5, False, digest, ClauseStore(SymbolTable(5, 5)))
+    assert kb_cache.load(other_path, 4, False, digest, ClauseStore(SymbolTable(4, 4)))
+
+
+def test_cache_is_opt_in(tmp_path, monkeypatch):
+    monkeypatch.delenv('WUMPUS_KB_CACHE', raising=False)
+    monkeypatch.setenv('HOME', str(tmp_path))
+    AXIOM_TEMPLATES.pop((3, False), None)
+    build_init_kb(3, WumpusEnvironment(N=3))
+    assert kb_cache.default_directory() is None and not list(tmp_path.rglob('*.bin'))
+
+    monkeypatch.setenv('WUMPUS_KB_CACHE', str(tmp_path / 'cache'))
+    AXIOM_TEMPLATES.pop((3, False), None)
+    build_init_kb(3, WumpusEnvironment(N=3))
+    assert os.path.exists(kb_cache.path(str(tmp_path / 'cache'), 3, False))
@@ -0,0 +1,105 @@
+from itertools import product
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional, to_cnf
+from clause_db import LiteralTable
+from sat_solver import Solver
+
+
+def satisfiable(clauses):
+    return Solver(clauses).solve()
+
+
+def test_tseitin_cnf():
+    A, B, C, D = Symbol('A'), Symbol('B'), Symbol('C'), Symbol('D')
+    sentence = Or(And(A, B), And(C, D), Not(Implication(A, Biconditional(B, C))))
+    try:
+        to_cnf(sentence)
+        assert False, "distribution should not handle several And disjuncts"
+    except ValueError:
+        pass
+
+    cnf = to_cnf(sentence, tseitin=True)
+    print(f"Tseitin CNF: {cnf.formula()}")
+    assert all(isinstance(c, (Symbol, Not, Or)) for c in cnf.conjuncts)
+
+    # Equisatisfiable under every assignment of the original symbols
+    table = LiteralTable()
+    clauses = table.encode(sentence, tseitin=True)
+    for values in product([True, False], repeat=4):
+        model = dict(zip('ABCD', values))
+        units = [(table.variable(name) if value else -table.variable(name),)
+                 for name, value in model.items()]
+        assert satisfiable(clauses + units) == sentence.evaluate(model)
+
+
+def test_tseitin_cnf_is_linear():
+    # (A1 ∧ B1) ∨ ... ∨ (An ∧ Bn) has 2^n clauses when distributed
+    n = 12
+    sentence = Or(*[And(Symbol(f'A{i}'), Symbol(f'B{i}')) for i in range(n)])
+    cnf = to_cnf(sentence, tseitin=True)
+    assert len(cnf.conjuncts) == 1 + 3 * n
+    assert to_cnf(sentence, tseitin=True) == cnf
+
+
+def test_kb_accepts_nested_sentences():
+    from knowledgeBase import KnowledgeBase
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    # Exactly one of the Wumpus cells next to (1, 1)
+    w12, w21 = kb.symbols[('Wumpus', 1, 2)], kb.symbols[('Wumpus', 2, 1)]
+    kb += Or(And(w12, Not(w21)), And(w21, Not(w12)))
+    kb += Not(w12)
+    assert kb.ask(w21)
+
+
+def test_kb_retracts_tseitin_encoded_sentences():
+    from knowledgeBase import KnowledgeBase
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    size = len(kb.store)
+    a, b, c, d = (Symbol(name) for name in 'abcd')
+    kb += Or(And(a, b), And(c, d))
+    kb += Not(c)
+    assert kb.ask(And(a, b))
+    kb.remove_clause(Or(And(a, b), And(c, d)))
+    assert not kb.ask(a)
+    kb.remove_clause(Not(c))
+    assert len(kb.store) == size and not kb.told
+
+
+def test_tseitin_names_are_bounded(monkeypatch):
+    import logic
+    monkeypatch.setattr(logic, 'CNF_CACHE_SIZE', 4)
+    monkeypatch.setattr(logic, 'tseitin_names', logic.OrderedDict())
+    first = logic.tseitin_symbol(('first',))
+    names = {first} | {logic.tseitin_symbol((i,)) for i in range(10)}
+    assert len(logic.tseitin_names) == 4 and len(names) == 11
+    # An evicted key gets a new name, never one still in use
+    assert logic.tseitin_symbol(('first',)) not in names
+    assert logic.tseitin_symbol((9,)) == logic.tseitin_symbol((9,))
+
+
+def test_cnf_compiler_is_memoized():
+    A, B, C = Symbol('A'), Symbol('B'), Symbol('C')
+    cnf = to_cnf(Biconditional(A, Or(B, C)))
+    assert cnf.formula() == to_cnf(Biconditional(A, Or(B, C))).formula()
+    assert cnf == And(Or(Not(A), B, C), Or(Not(B), A), Or(Not(C), A))
+
+    hits = to_cnf.cache_info().hits
+    assert to_cnf(Biconditional(Symbol('A'), Or(Symbol('B'), Symbol('C')))) is cnf
+    assert to_cnf.cache_info().hits == hits + 1
+    assert to_cnf(Not(Not(A))) == A
+
+
+def test_sentences_are_interned():
+    A, B = Symbol('A'), Symbol('B')
+    assert Symbol('A') is A
+    assert Or(Not(A), B) is Or(Not(Symbol('A')), Symbol('B'))
+    assert Biconditional(A, Or(B)) is Biconditional(A, Or(B))
+    assert Or(Not(A), B).formula() is Or(Not(A), B).formula()
+    assert not hasattr(A, '__dict__')
+
+    # And stays a mutable container compared by structure
+    conjunction = And(A)
+    assert conjunction is not And(A) and conjunction == And(A)
+    conjunction.add(B)
+    assert conjunction == And(A, B) and hash(conjunction) == hash(And(A, B))
+    assert Not(And(A, B)) == Not(conjunction)
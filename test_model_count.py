@@ -0,0 +1,77 @@
+from itertools import product
+
+from knowledgeBase import KnowledgeBase
+from object import Breeze
+from logic import Symbol, Not, And, Or, Implication, count_models, marginals
+import model_count
+
+
+def brute_count(clauses, weights, variables):
+    total = 0
+    for values in product([True, False], repeat=len(variables)):
+        model = dict(zip(variables, values))
+        if all(any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses):
+            weight = 1
+            for var, value in model.items():
+                pair = weights.get(var, (1, 1))
+                weight *= pair[0] if value else pair[1]
+            total += weight
+    return total
+
+
+def test_count_matches_brute_force():
+    # Two components, a definition (4 <-> 1 | 2) and a free variable 6.
+    clauses = [(1, 2), (-1, -3), (-4, 1, 2), (-1, 4), (-2, 4), (3, 5)]
+    variables = [1, 2, 3, 4, 5, 6]
+    for weights in ({}, {1: (0.2, 0.8), 2: (0.3, 0.7), 3: (0.5, 0.5)}):
+        expected = brute_count(clauses, weights, variables)
+        assert abs(model_count.count(clauses, weights, variables) - expected) < 1e-9
+        extras = [[(1,)], [(-4,)], [(6,)], [(-2, -5)]]
+        counts = model_count.count_each(clauses, extras, weights, variables)
+        print(weights, counts)
+        assert abs(counts[0] - expected) < 1e-9
+        for extra, value in zip(extras, counts[1:]):
+            assert abs(value - brute_count(clauses + extra, weights, variables)) < 1e-9
+
+
+def test_marginals_around_a_breeze():
+    kb = KnowledgeBase(N=3)
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    pit = lambda y, x: kb.symbols[('Pit', y, x)]
+    assert count_models(kb, [Not(pit(1, 2)), Not(pit(2, 1))]) == 0
+    assert count_models(kb, [pit(1, 2)]) > 0
+
+    priors = {'Pit': 0.2, 'Wumpus': 0.1}
+    queries = [pit(1, 2), pit(2, 1), Or(pit(1, 2), pit(2, 1))]
+    probability = marginals(kb, queries, priors)
+    print(probability)
+    assert abs(probability[pit(1, 2)] - probability[pit(2, 1)]) < 1e-9
+    assert probability[pit(1, 2)] > 0.2
+    assert abs(probability[Or(pit(1, 2), pit(2, 1))] - 1) < 1e-9
+
+
+def test_count_with_a_tseitin_encoded_sentence():
+    kb = KnowledgeBase(N=2)
+    base = count_models(kb)
+    a, b, c, d = (Symbol(name) for name in 'abcd')
+    kb += Or(And(a, b), And(c, d))
+    assert any(name.startswith('_T') for name in kb.clauses.symbols())
+    # (a ∧ b) ∨ (c ∧ d) has 7 models over a, b, c, d; the auxiliaries add none
+    assert count_models(kb) == 7 * base
+    probability = marginals(kb, [a])
+    print(probability)
+    assert abs(probability[a] - 5 / 7) < 1e-9
+
+
+def test_tautologies_leave_the_count_unchanged():
+    kb = KnowledgeBase(N=2)
+    a, b = Symbol('a'), Symbol('b')
+    kb += Or(a, Not(a))
+    kb += Implication(b, b)
+    base = count_models(kb)
+    assert count_models(kb, [a]) == count_models(kb, [Not(a)]) == base / 2
+    probability = marginals(kb, [a, Not(a), b, Not(b)])
+    print(probability)
+    assert abs(probability[a] + probability[Not(a)] - 1) < 1e-9
+    assert abs(probability[b] + probability[Not(b)] - 1) < 1e-9
+    assert abs(probability[a] - 0.5) < 1e-9
@@ -1,6 +1,6 @@
 from knowledgeBase import KnowledgeBase
 from object import Stench, Breeze
-from logic import Symbol, Not
+from logic import Symbol, Not, Or
 
 def test_percept_handling():
     # Initialize KB with a 4x4 grid for simplicity
@@ -34,5 +34,28 @@ def test_percept_handling():
     print("After adding Breeze:", kb.clause_formulas)
     print(f"Breeze symbol at (3,3) present:", breeze_symbol.formula() in str(kb.clauses))
 
+def test_kbs_share_axioms_copy_on_write():
+    first = KnowledgeBase(N=5)
+    second = KnowledgeBase(N=5)
+    axioms = len(second.store)
+    assert second.store.entries is KnowledgeBase(N=5).store.entries
+
+    second.update_percept_sentence((1, 1), [Breeze()])
+    first += Not(first.symbols[('Stench', 1, 1)])
+    # A removal on a fresh fork copies too.
+    fourth = KnowledgeBase(N=5)
+    assert fourth.store.remove(Not(fourth.symbols[('Pit', 1, 1)])) is not None
+    third = KnowledgeBase(N=5)
+    # Breeze and ¬Stench at (1, 1)
+    assert len(first.store) == axioms + 1 and len(second.store) == axioms + 2
+    assert len(third.store) == axioms
+    assert Not(third.symbols[('Pit', 1, 1)]) in third.store
+    assert third.ask(Not(third.symbols[('Pit', 1, 1)]))
+    assert not third.ask(Or(third.symbols[('Pit', 1, 2)], third.symbols[('Pit', 2, 1)]))
+    assert second.ask(Or(second.symbols[('Pit', 1, 2)], second.symbols[('Pit', 2, 1)]))
+    assert first.ask(Not(first.symbols[('Wumpus', 1, 2)]))
+    assert not third.ask(Not(third.symbols[('Wumpus', 1, 2)]))
+
 if __name__ == "__main__":
     test_percept_handling()
+    test_kbs_share_axioms_copy_on_write()
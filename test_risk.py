@@ -0,0 +1,20 @@
+from knowledgeBase import KnowledgeBase
+from environment import WumpusEnvironment
+from object import Breeze
+from risk import cell_risks, path_cells, path_risk
+
+
+def test_path_risk_counts_every_cell_entered():
+    env = WumpusEnvironment(N=3, K_wumpuses=1, pit_probability=0.2)
+    kb = KnowledgeBase(N=3)
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    cells = path_cells((1, 1), ["up", "right"])
+    assert cells == [(2, 1), (2, 2)]
+    risks = cell_risks(kb, env, cells)
+    print(risks)
+    assert risks[(2, 1)] > 0.5 and 0 < risks[(2, 2)] < risks[(2, 1)]
+    # Reaching (2, 2) through (2, 1) is riskier than the target alone
+    risk = path_risk(risks, cells)
+    assert risk > risks[(2, 1)]
+    assert abs(risk - (1 - (1 - risks[(2, 1)]) * (1 - risks[(2, 2)]))) < 1e-6
+    assert cell_risks(None, env, cells) is None
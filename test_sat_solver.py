@@ -0,0 +1,137 @@
+from knowledgeBase import KnowledgeBase
+from object import Breeze, Stench
+from logic import Not, Or, And, to_cnf
+import sat_solver
+from propagation import Propagator
+
+
+def test_solver_learns_and_backjumps():
+    # Pigeonhole: 3 pigeons in 2 holes is unsatisfiable and needs learning.
+    p = lambda i, h: i * 2 + h + 1
+    clauses = [(p(i, 0), p(i, 1)) for i in range(3)]
+    for h in range(2):
+        for i in range(3):
+            for j in range(i + 1, 3):
+                clauses.append((-p(i, h), -p(j, h)))
+    solver = sat_solver.Solver(clauses)
+    assert not solver.solve()
+    assert solver.conflicts > 0
+
+    solver = sat_solver.Solver(clauses[:2] + clauses[3:])
+    assert solver.solve()
+    assert all(any(solver.model[abs(l)] == (l > 0) for l in c) for c in clauses[:2] + clauses[3:])
+
+
+def test_solver_assumptions():
+    solver = sat_solver.Solver([(1, 2), (-1, 3)])
+    assert solver.solve([1])
+    assert solver.model[3]
+    assert not solver.solve([1, -3])
+    assert solver.solve([-3])
+
+
+def test_cdcl_backend():
+    kb = KnowledgeBase(N=12, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    assert kb.ask(kb.symbols[('Pit', 2, 1)])
+    assert kb.ask(Not(kb.symbols[('Wumpus', 2, 1)]))
+    assert not kb.ask(Not(kb.symbols[('Wumpus', 1, 3)]))
+    assert not kb.ask(kb.symbols[('Wumpus', 1, 3)])
+
+
+def test_watched_literal_propagation():
+    propagator = Propagator([(-1, 2), (-2, 3), (-3, 4, 5), (1,)])
+    units, clauses = propagator.simplify()
+    assert units == {1, 2, 3}
+    assert clauses == [(4, 5)]
+
+    propagator.add_clause([-4])
+    propagator.add_clause([-5])
+    assert propagator.propagate() is not None
+    assert propagator.simplify() is None
+
+
+def test_ask_many_matches_ask():
+    kb = KnowledgeBase(N=6, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    queries = [Not(kb.symbols[(kind, y, x)]) for y in range(1, 7) for x in range(1, 7)
+               for kind in ('Pit', 'Wumpus')]
+    queries.append(Or(kb.symbols[('Pit', 2, 1)], kb.symbols[('Wumpus', 1, 3)]))
+    queries.append(And(Not(kb.symbols[('Pit', 1, 2)]), Not(kb.symbols[('Wumpus', 2, 1)])))
+    results = kb.ask_many(queries)
+    print(sum(results.values()), "of", len(results), "entailed")
+    assert results == {q: sat_solver.entails(kb, q) for q in queries}
+    assert kb.stats['ask_misses'] + kb.stats['fast_path'] == len(queries)
+    assert kb.ask(queries[-2]) == results[queries[-2]]
+    assert kb.stats['ask_hits'] == 1
+
+
+def test_backbone_cell_masks():
+    kb = KnowledgeBase(N=6, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    entailed = kb.backbone()
+    for (kind, y, x), value in entailed.items():
+        symbol = kb.symbols[(kind, y, x)]
+        assert sat_solver.entails(kb, symbol if value else Not(symbol))
+    safe, unsafe, unknown = kb.cell_masks()
+    print(safe, unsafe, unknown, sep='\n')
+    assert safe[0][0] and safe[0][1]
+    assert unsafe[1][0]                 # Pit_2_1
+    assert unknown[0][2] and not safe[0][2]
+    for y in range(6):
+        for x in range(6):
+            assert safe[y][x] + unsafe[y][x] + unknown[y][x] == 1
+    assert kb.backbone() is entailed
+
+
+def test_incremental_solver_follows_kb():
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    solver = kb.solver
+    pit = kb.symbols[('Pit', 2, 1)]
+    assert not solver.entails(pit)
+    kb += Not(kb.symbols[('Pit', 1, 2)])
+    kb += kb.symbols[('Breeze', 1, 1)]
+    assert solver.entails(pit)
+    assert len(solver.guards) == 2
+
+    # Retracting a told fact switches its clauses off.
+    kb.remove_clause(kb.symbols[('Breeze', 1, 1)])
+    assert not solver.entails(pit)
+    assert len(solver.guards) == 1
+    assert kb.solver is solver and solver.rebuilds == 0
+
+    # Removing an axiom from the store rebuilds the solver.
+    axiom = to_cnf(Not(kb.symbols[('Pit', 1, 1)]))
+    kb.store.remove(axiom)
+    kb._changed(set())
+    assert not solver.entails(Not(kb.symbols[('Pit', 1, 1)]))
+    assert solver.rebuilds == 1
+    for y in range(1, 5):
+        for x in range(1, 5):
+            for kind in ('Pit', 'Wumpus'):
+                query = Not(kb.symbols[(kind, y, x)])
+                assert solver.entails(query) == sat_solver.entails(kb, query)
+
+
+def test_incremental_queries_leave_no_clauses():
+    kb = KnowledgeBase(N=4, backend='cdcl')
+    solver = kb.solver
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [])
+    solver.sync()
+    variables = len(kb.store.table)
+    query = kb.store.table.variable('_Q')
+    for _ in range(3):
+        for y in range(1, 5):
+            for x in range(1, 5):
+                pit, wumpus = kb.symbols[('Pit', y, x)], kb.symbols[('Wumpus', y, x)]
+                assert solver.entails(Or(pit, wumpus)) == sat_solver.entails(kb, Or(pit, wumpus))
+                assert solver.entails(And(Not(pit), Not(wumpus))) == \
+                    sat_solver.entails(kb, And(Not(pit), Not(wumpus)))
+    assert solver.queries > 0 and len(kb.store.table) == variables + 1
+    assert not solver.solver.guarded and query not in solver.solver.assigns
+    assert not any(-query in clause for clause in solver.solver.learnts)
+    assert not any(-query in clause for watched in solver.solver.watches.values() for clause in watched)
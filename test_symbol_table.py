@@ -0,0 +1,30 @@
+from knowledgeBase import KnowledgeBase
+from logic import Symbol
+from symbol_table import SymbolTable, KINDS
+
+
+def test_ids_are_dense_and_arithmetic():
+    table = SymbolTable(3, 2)
+    ids = [table.id(key) for key in table]
+    assert sorted(ids) == list(range(1, len(KINDS) * 6 + 1))
+    assert all(table.key(table.id(key)) == key for key in table)
+    assert table.id(('Pit', 3, 1)) is None and ('Pit', 3, 1) not in table
+    assert table.id_of_name('Breeze_2_3') == table.id(('Breeze', 2, 3))
+    assert table.id_of_name('_A12') is None
+
+
+def test_symbols_are_created_on_first_use():
+    kb = KnowledgeBase(N=4)
+    print(len(kb.symbols.created), 'of', len(kb.symbols), 'symbols created')
+    assert ('Glitter', 2, 2) in kb.symbols
+    assert ('Glitter', 2, 2) not in kb.symbols.created
+    assert kb.symbols[('Glitter', 2, 2)] is Symbol('Glitter_2_2')
+    assert ('Glitter', 2, 2) in kb.symbols.created
+
+    # The store's variables are the arithmetic ids.
+    table = kb.store.table
+    for key in [('Pit', 1, 2), ('Stench', 4, 4), ('Glitter', 2, 2)]:
+        assert table.variable(kb.symbols[key].name) == kb.symbols.id(key)
+
+    kb.symbols['Shoot'] = Symbol('Shoot_0')
+    assert kb.symbols['Shoot'] is Symbol('Shoot_0') and len(kb.symbols) == len(KINDS) * 16 + 1
@@ -0,0 +1,34 @@
+from knowledgeBase import KnowledgeBase
+from object import Breeze, Stench
+from logic import Not, And
+import model_count
+import truth_table
+import sat_solver
+
+
+def test_truth_table_counts():
+    clauses = [(1, 2), (-1, -3), (-4, 1, 2), (-1, 4), (-2, 4), (3, 5)]
+    variables = [1, 2, 3, 4, 5, 6]
+    assert truth_table.satisfiable(clauses)
+    assert truth_table.satisfiable(clauses + [(-1,), (-2,)]) is False
+    assert truth_table.satisfiable([(1, var) for var in range(2, 30)]) is None
+    for weights in ({}, {1: (0.2, 0.8), 2: (0.2, 0.8), 3: (0.1, 0.9), 5: (0.1, 0.9)}):
+        expected = model_count.count(clauses, weights, variables)
+        print(weights, expected)
+        assert abs(truth_table.weighted_count(clauses, weights, variables) - expected) < 1e-9
+
+
+def test_truth_table_entailment():
+    kb = KnowledgeBase(N=5, backend='cdcl')
+    kb.update_percept_sentence((1, 1), [Breeze()])
+    kb.update_percept_sentence((1, 2), [Stench()])
+    kb += Not(kb.symbols[('Breeze', 1, 2)])
+    queries = [q for y in range(1, 6) for x in range(1, 6)
+               for q in (Not(kb.symbols[('Pit', y, x)]), kb.symbols[('Wumpus', y, x)],
+                         And(Not(kb.symbols[('Pit', y, x)]), Not(kb.symbols[('Wumpus', y, x)])))]
+    for query in queries:
+        assert truth_table.entails(kb, query) == sat_solver.entails(kb, query)
+    answers = kb.ask_many(queries)
+    print(dict(kb.stats))
+    assert kb.stats['truth_table'] > 0
+    assert all(answers[query] == sat_solver.entails(kb, query) for query in queries)
@@ -0,0 +1,136 @@
+"""
+Bit-parallel truth tables for small clause sets.
+
+With k variables, an integer of 2^k bits holds one truth value per
+assignment: bit b is the value under the assignment that makes the i-th
+variable true exactly when bit i of b is set. A variable's column is then
+a fixed bit pattern, a clause is the OR of its literals' columns (a
+negative literal takes the complement) and a clause set is the AND of its
+clauses, so each clause costs a few big-integer operations that evaluate
+all 2^k assignments at once.
+
+Slices of the Wumpus KB around a single cell often mention fewer than 20
+symbols; on those this beats clause-level search. Literals and clauses
+follow the clause_db encoding.
+"""
+
+from collections import defaultdict
+from functools import lru_cache
+
+from logic import Not
+
+MAX_SYMBOLS = 20          # largest slice decided on its truth table
+MAX_COUNT_SYMBOLS = 12    # largest component model_count hands over; counting
+                          # splits on weights, so the break-even point is lower
+
+
+@lru_cache(maxsize=None)
+def _columns(k):
+    """The column of each of k variables, over 2^k assignments."""
+    size = 1 << k
+    columns = []
+    for i in range(k):
+        width = 1 << i
+        pattern = ((1 << width) - 1) << width
+        span = width << 1
+        while span < size:
+            pattern |= pattern << span
+            span <<= 1
+        columns.append(pattern)
+    return columns
+
+
+def models(clauses, variables):
+    """Bitmask of the assignments to `variables` (a list) that satisfy the clauses."""
+    columns = _columns(len(variables))
+    full = (1 << (1 << len(variables))) - 1
+    column = dict(zip(variables, columns))
+    result = full
+    for clause in clauses:
+        value = 0
+        for lit in clause:
+            value |= column[lit] if lit > 0 else full ^ column[-lit]
+        result &= value
+        if not result:
+            break
+    return result
+
+
+def satisfiable(clauses):
+    """True if the clauses have a model, or None if they mention more than MAX_SYMBOLS variables."""
+    variables = sorted({abs(lit) for clause in clauses for lit in clause})
+    if len(variables) > MAX_SYMBOLS:
+        return None
+    if any(not clause for clause in clauses):
+        return False
+    return models(clauses, variables) != 0
+
+
+def weighted_count(clauses, weights=None, variables=None):
+    """Weighted model count of the clauses over `variables` (see model_count.count).
+
+    Variables with the same weights are counted together: a bit-sliced
+    counter gives, for every assignment, how many of them it makes true,
+    and the models with each number of true ones share one product of
+    weights.
+    """
+    weights = weights or {}
+    if variables is None:
+        variables = {abs(lit) for clause in clauses for lit in clause}
+    variables = sorted(variables)
+    mask = models(clauses, variables)
+    if not mask:
+        return 0
+    full = (1 << (1 << len(variables))) - 1
+    groups = defaultdict(list)
+    for var, column in zip(variables, _columns(len(variables))):
+        pair = weights.get(var)
+        if pair is not None:
+            groups[pair].append(column)
+    counters = [(pair, len(columns), _count_true(columns)) for pair, columns in groups.items()]
+
+    def total(mask, index):
+        if index == len(counters):
+            return bin(mask).count('1')
+        (true, false), size, planes = counters[index]
+        result = 0
+        for number in range(size + 1):
+            selected = mask
+            for bit, plane in enumerate(planes):
+                selected &= plane if number >> bit & 1 else full ^ plane
+                if not selected:
+                    break
+            if selected:
+                result += true ** number * false ** (size - number) * total(selected, index + 1)
+        return result
+
+    return total(mask, 0)
+
+
+def _count_true(columns):
+    """Bit planes of the number of the columns that are set, per assignment."""
+    planes = []
+    for carry in columns:
+        for bit in range(len(planes)):
+            planes[bit], carry = planes[bit] ^ carry, planes[bit] & carry
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+    return planes
+
+
+def entails(kb, query):
+    """Decide KB |= query on the truth table of the query's slice of the KB.
+
+    Returns None if the slice (KnowledgeBase.relevant_clauses) and the
+    negated query mention more than MAX_SYMBOLS variables; the size of the
+    slice is accumulated in kb.stats like the resolution engines do.
+    """
+    query_clauses = kb.store.table.encode(Not(query))
+    clauses = kb.relevant_clauses(query_clauses) + query_clauses
+    answer = satisfiable(clauses)
+    if answer is None:
+        return None
+    kb.stats['clauses'] += len(clauses)
+    return not answer